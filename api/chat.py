@@ -1,26 +1,74 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from models.chat import ChatRequest, ChatResponse
-from services.llm_service import LLMService
-from services.weather_service import WeatherService
-from services.audio_service import AudioService
-from services.chroma_service import ChromaService
-from services.disease_service import DiseaseService
-from config.settings import Settings
+from api.dependencies import (
+    get_audio_service,
+    get_chroma_service,
+    get_container,
+    get_llm_service,
+    get_memory_compactor,
+    get_weather_service
+)
+from services.container import ServiceContainer
 from utils.logging import setup_logging
-import os
+from utils.text import iter_sentences
+import asyncio
+import base64
+import json
+from collections import deque
 
 router = APIRouter()
-settings = Settings()
 logger = setup_logging()
 
-chroma_service = ChromaService(settings)
-llm_service = LLMService(settings.llm_model, chroma_service)
-weather_service = WeatherService(settings)
-audio_service = AudioService()
-disease_service = DiseaseService(settings)
+async def detect_disease(
+    container: ServiceContainer,
+    image: Optional[UploadFile],
+    detected_disease: Optional[str]
+) -> Optional[str]:
+    # Process image if provided, overriding detected_disease from form-data
+    if not image:
+        return detected_disease
+    image_content = await image.read()
+    logger.info(f"Received image: {image.filename}, size: {len(image_content)} bytes")
+    try:
+        # Only image requests need the disease model
+        disease_service = await container.aget("disease_service")
+        detected_disease = await disease_service.process_uploaded_image(image_content, image.filename)
+        logger.info(f"Disease detection result: {detected_disease}")
+        return detected_disease
+    except Exception as e:
+        logger.error(f"Error in disease detection: {str(e)}")
+        return None  # Proceed without disease if detection fails
+
+@router.get("/chat/embeddings/stats", response_model=dict)
+async def embedding_cache_stats(chroma_service=Depends(get_chroma_service)):
+    embeddings = chroma_service.embeddings
+    if not hasattr(embeddings, "stats"):
+        return {"enabled": False}
+    return {"enabled": True, **embeddings.stats()}
+
+@router.get("/chat/cache/stats", response_model=dict)
+async def response_cache_stats(llm_service=Depends(get_llm_service)):
+    if llm_service.response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_service.response_cache.stats()}
 
-os.environ["PATH"] += os.pathsep + settings.ffmpeg_path
+@router.get("/chat/prompt/stats", response_model=dict)
+async def prompt_budget_stats(llm_service=Depends(get_llm_service)):
+    return llm_service.prompt_budget.stats()
+
+@router.get("/chat/memory/stats", response_model=dict)
+async def memory_stats(
+    chroma_service=Depends(get_chroma_service),
+    memory_compactor=Depends(get_memory_compactor)
+):
+    # Current index size and retrieval latency, plus one snapshot per compaction run
+    return {
+        "index": await asyncio.to_thread(chroma_service.stats),
+        "compaction": memory_compactor.stats(),
+        "history": memory_compactor.report()
+    }
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_text(
@@ -28,26 +76,22 @@ async def chat_text(
     conversation_history: Optional[List[str]] = Form(None),
     detected_disease: Optional[str] = Form(None),
     country: Optional[str] = Form(None),
-    image: Optional[UploadFile] = File(None)
+    session_id: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    llm_service=Depends(get_llm_service),
+    weather_service=Depends(get_weather_service),
+    container: ServiceContainer = Depends(get_container)
 ):
     try:
-        # Process image if provided, overriding detected_disease from form-data
-        if image:
-            image_content = await image.read()
-            logger.info(f"Received image: {image.filename}, size: {len(image_content)} bytes")
-            try:
-                detected_disease = disease_service.process_uploaded_image(image_content, image.filename)
-                logger.info(f"Disease detection result: {detected_disease}")
-            except Exception as e:
-                logger.error(f"Error in disease detection: {str(e)}")
-                detected_disease = None  # Proceed without disease if detection fails
+        detected_disease = await detect_disease(container, image, detected_disease)
 
         # Create request object
         request = ChatRequest(
             question=question,
             conversation_history=conversation_history or [],
             detected_disease=detected_disease,
-            country=country
+            country=country,
+            session_id=session_id
         )
         
         # Log the request for debugging
@@ -58,49 +102,101 @@ async def chat_text(
         logger.error(f"Chat processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/chat/stream")
+async def chat_stream(
+    question: str = Form(...),
+    conversation_history: Optional[List[str]] = Form(None),
+    detected_disease: Optional[str] = Form(None),
+    country: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    llm_service=Depends(get_llm_service),
+    weather_service=Depends(get_weather_service),
+    container: ServiceContainer = Depends(get_container)
+):
+    detected_disease = await detect_disease(container, image, detected_disease)
+    request = ChatRequest(
+        question=question,
+        conversation_history=conversation_history or [],
+        detected_disease=detected_disease,
+        country=country,
+        session_id=session_id
+    )
+
+    # Newline-delimited JSON: one {"token": ...} line per chunk, then a final {"done": true}
+    async def events():
+        try:
+            async for token in llm_service.stream_query(request, weather_service):
+                yield json.dumps({"token": token}) + "\n"
+            yield json.dumps({"done": True, "detected_disease": detected_disease}) + "\n"
+        except Exception as e:
+            logger.error(f"Chat streaming error: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @router.post("/chat/audio")
 async def chat_audio(
     audio_file: UploadFile = File(...),
     detected_disease: Optional[str] = Form(None),
     conversation_history: Optional[List[str]] = Form(None),
     country: Optional[str] = Form(None),
-    image: Optional[UploadFile] = File(None)
+    session_id: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    llm_service=Depends(get_llm_service),
+    weather_service=Depends(get_weather_service),
+    container: ServiceContainer = Depends(get_container),
+    audio_service=Depends(get_audio_service)
 ):
     logger.info("Received audio request")
-    tmp_audio_path = None
-    output_path = "response.mp3"
-    
     try:
-        tmp_audio_path = audio_service.validate_audio(await audio_file.read(), audio_file.content_type)
-        question = audio_service.speech_to_text(tmp_audio_path)
-
-        if image:
-            image_content = await image.read()
-            detected_disease = disease_service.process_uploaded_image(image_content, image.filename)
-
-        chat_request = ChatRequest(
-            question=question,
-            conversation_history=conversation_history or [],
-            detected_disease=detected_disease,
-            country=country
-        )
-
-        llm_response = await llm_service.process_query(chat_request, weather_service)
-        audio_base64 = audio_service.text_to_speech(llm_response.response, output_path)
-
-        return {
-            "question": question,
-            "text_response": llm_response.response,
-            "audio_base64": audio_base64
-        }
+        question = await audio_service.transcribe(await audio_file.read(), audio_file.content_type)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if tmp_audio_path and os.path.exists(tmp_audio_path):
-            try:
-                os.unlink(tmp_audio_path)
-            except Exception as e:
-                logger.error(f"Cleanup error: {str(e)}")
\ No newline at end of file
+
+    detected_disease = await detect_disease(container, image, detected_disease)
+    request = ChatRequest(
+        question=question,
+        conversation_history=conversation_history or [],
+        detected_disease=detected_disease,
+        country=country,
+        session_id=session_id
+    )
+    min_chars = container.settings.audio_sentence_min_chars
+
+    # Newline-delimited JSON: {"question"} first, then per sentence a {"text"} line
+    # followed by its {"audio"} (base64) once synthesized, then a final {"done": true}.
+    # Sentences are synthesized while the LLM is still generating the next ones.
+    async def events():
+        yield json.dumps({"question": question, "detected_disease": detected_disease}) + "\n"
+        pending = deque()
+        index = 0
+        try:
+            async for sentence in iter_sentences(llm_service.stream_query(request, weather_service), min_chars):
+                yield json.dumps({"index": len(pending) + index, "text": sentence}) + "\n"
+                pending.append(asyncio.create_task(audio_service.synthesize(sentence)))
+                while pending and pending[0].done():
+                    yield audio_event(index, await pending.popleft())
+                    index += 1
+            while pending:
+                yield audio_event(index, await pending.popleft())
+                index += 1
+            yield json.dumps({"done": True}) + "\n"
+        except Exception as e:
+            logger.error(f"Audio streaming error: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def audio_event(index: int, audio: bytes) -> str:
+        return json.dumps({
+            "index": index,
+            "audio": base64.b64encode(audio).decode("utf-8"),
+            "media_type": audio_service.media_type
+        }) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
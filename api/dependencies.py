@@ -0,0 +1,38 @@
+from fastapi import Request
+from services.container import ServiceContainer
+
+
+def get_container(request: Request) -> ServiceContainer:
+    return request.app.state.container
+
+
+async def get_llm_service(request: Request):
+    container = get_container(request)
+    llm_service = await container.aget("llm_service")
+    # Under lazy warm-up, memory maintenance begins with the first chat request
+    await container.start_maintenance()
+    return llm_service
+
+
+async def get_http_client(request: Request):
+    return await get_container(request).aget("http_client")
+
+
+async def get_weather_service(request: Request):
+    return await get_container(request).aget("weather_service")
+
+
+async def get_disease_service(request: Request):
+    return await get_container(request).aget("disease_service")
+
+
+async def get_audio_service(request: Request):
+    return await get_container(request).aget("audio_service")
+
+
+async def get_chroma_service(request: Request):
+    return await get_container(request).aget("chroma_service")
+
+
+async def get_memory_compactor(request: Request):
+    return await get_container(request).aget("memory_compactor")
@@ -1,19 +1,59 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
-from config.settings import Settings
-from services.disease_service import DiseaseService
+import json
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
+from fastapi.responses import StreamingResponse
+from api.dependencies import get_container, get_disease_service
+from services.field_survey import FieldSurveySummary, close_staged, iter_chunks, iter_uploaded_images, stage_uploads
 from utils.logging import setup_logging  # Fixed typo from 'setup_logger' to 'setup_logging'
 
 router = APIRouter()
-settings = Settings()
-disease_service = DiseaseService(settings)
 logger = setup_logging()
 
+@router.get("/disease/cache/stats", response_model=dict)
+async def prediction_cache_stats(disease_service=Depends(get_disease_service)):
+    if disease_service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **disease_service.cache.stats()}
+
 @router.post("/disease/predict", response_model=dict)
-async def predict_disease(file: UploadFile = File(...)):
+async def predict_disease(file: UploadFile = File(...), disease_service=Depends(get_disease_service)):
     try:
         content = await file.read()
-        predicted_class = disease_service.process_uploaded_image(content, file.filename)
+        predicted_class = await disease_service.process_uploaded_image(content, file.filename)
         return {"predicted_class": predicted_class}
     except Exception as e:
         logger.error(f"Error in disease prediction: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/disease/predict/batch")
+async def predict_disease_batch(
+    files: List[UploadFile] = File(...),
+    disease_service=Depends(get_disease_service),
+    container=Depends(get_container)
+):
+    settings = container.settings
+    staged = await stage_uploads(files)
+
+    async def generate():
+        summary = FieldSurveySummary()
+        try:
+            images = iter_uploaded_images(
+                staged,
+                settings.disease_survey_max_images,
+                int(settings.disease_survey_max_image_mb * 1024 * 1024),
+                settings.disease_survey_max_compression_ratio
+            )
+            batch = 0
+            async for chunk in iter_chunks(images, settings.disease_survey_chunk_size):
+                results = await disease_service.predict_many(chunk)
+                summary.add(results)
+                yield json.dumps({"batch": batch, "results": results}) + "\n"
+                batch += 1
+            yield json.dumps({"done": True, "summary": summary.to_dict()}) + "\n"
+        except Exception as e:
+            logger.error(f"Error in batch disease prediction: {str(e)}")
+            yield json.dumps({"error": str(e), "summary": summary.to_dict()}) + "\n"
+        finally:
+            close_staged(staged)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
\ No newline at end of file
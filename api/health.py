@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from api.dependencies import get_container
+from services.container import ServiceContainer
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness():
+    # The process is up and serving requests; says nothing about loaded models
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness(container: ServiceContainer = Depends(get_container)):
+    report = container.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from utils import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    # Sync on purpose: collectors query Chroma and walk its storage, so scrapes run in the threadpool
+    if not metrics.enabled():
+        return Response(status_code=404, content="Metrics are disabled (METRICS_ENABLED=false)\n", media_type="text/plain")
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,47 @@
+import time
+import uuid
+from utils import metrics
+from utils.logging import request_id_var
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class RequestContextMiddleware:
+    # Pure ASGI so streamed responses pass through untouched and are timed
+    # until their last chunk is sent. Assigns each request an ID (or reuses
+    # the caller's X-Request-ID) for log correlation and echoes it back.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+            if metrics.enabled():
+                # Route templates keep label cardinality bounded; unmatched paths share one label
+                route = scope.get("route")
+                path = getattr(route, "path", "unmatched")
+                metrics.HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], path)
+                metrics.HTTP_REQUESTS.inc(scope["method"], path, str(status))
@@ -1,19 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List
 from models.weather import WeatherDay
-from services.weather_service import WeatherService
-from config.settings import Settings
+from api.dependencies import get_http_client, get_weather_service
 from utils.logging import setup_logging
 
 router = APIRouter()
-settings = Settings()
 logger = setup_logging()
-weather_service = WeatherService(settings)
+
+@router.get("/weather/upstream/stats", response_model=dict)
+async def upstream_stats(http_client=Depends(get_http_client)):
+    return http_client.stats()
 
 @router.get("/weather", response_model=List[WeatherDay])
-async def get_weather(country: str):
+async def get_weather(country: str, weather_service=Depends(get_weather_service)):
     try:
-        return weather_service.get_full_weather_data(country.lower())
+        # Pre-serialized per archive version; skips per-row response_model validation
+        body = await weather_service.get_full_weather_json(country.lower())
+        return Response(content=body, media_type="application/json")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
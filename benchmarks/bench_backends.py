@@ -0,0 +1,80 @@
+# Load time, resident memory and per-batch latency of the disease model
+# backends. Each backend runs in a fresh process so imports and RSS are
+# measured in isolation.
+#
+#   python -m benchmarks.bench_backends --backends keras tflite --batch-sizes 1 8 16
+import argparse
+import json
+import multiprocessing as mp
+import statistics
+import time
+
+
+def _run(backend: str, model_path: str, batch_sizes: list, iterations: int, threads: int, results):
+    import numpy as np
+    from services.disease_backends import load_backend
+    from utils.memory import rss_mb
+
+    start_rss = rss_mb()
+    start = time.perf_counter()
+    model = load_backend(backend, model_path, threads, max_batch_size=max(batch_sizes))
+    load_seconds = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    rng = np.random.default_rng(0)
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = rng.random((batch_size, 128, 128, 3), dtype=np.float32)
+        model.predict(batch)  # warm-up
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            model.predict(batch)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        latency[str(batch_size)] = {
+            "mean_ms": round(statistics.fmean(timings), 2),
+            "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 2),
+            "images_per_sec": round(batch_size * 1000 / statistics.fmean(timings), 1)
+        }
+    results.put({
+        "backend": backend,
+        "model_path": model_path,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb_before_load": start_rss,
+        "rss_mb_after_load": loaded_rss,
+        "rss_mb_peak_run": rss_mb(),
+        "latency": latency
+    })
+
+
+def main():
+    from config.settings import Settings
+
+    settings = Settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=["keras", "tflite"])
+    parser.add_argument("--keras-model", default=settings.disease_model_path)
+    parser.add_argument("--tflite-model", default=settings.disease_tflite_model_path)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 16])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    report = []
+    for backend in args.backends:
+        model_path = args.tflite_model if backend == "tflite" else args.keras_model
+        process = ctx.Process(
+            target=_run,
+            args=(backend, model_path, args.batch_sizes, args.iterations, args.threads, results)
+        )
+        process.start()
+        process.join()
+        report.append(results.get() if process.exitcode == 0 else {"backend": backend, "error": f"exit code {process.exitcode}"})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Measures first-token latency and tokens/sec of LLMService.stream_query
+# against the blocking process_query, using a local mock Ollama server.
+#
+#   python -m benchmarks.bench_chat_stream --runs 5 --tokens 300 --token-ms 15
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from typing import Optional
+from benchmarks.mock_servers import MockOllamaServer
+
+
+def _summary(values: list) -> Optional[dict]:
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "mean": round(statistics.fmean(values), 2),
+        "p50": round(values[len(values) // 2], 2),
+        "max": round(values[-1], 2)
+    }
+
+
+async def _run(llm_service, runs: int) -> dict:
+    from models.chat import ChatRequest
+
+    request = ChatRequest(question="How do I treat tomato late blight?", conversation_history=[])
+    first_token_ms, stream_total_ms, tokens_per_sec, blocking_ms = [], [], [], []
+    empty_streams = 0
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            first = None
+            tokens = 0
+            async for _chunk in llm_service.stream_query(request, None):
+                if first is None:
+                    first = time.perf_counter()
+                tokens += 1
+            end = time.perf_counter()
+            if first is None:
+                # No tokens (e.g. the model call failed): counted, not timed
+                empty_streams += 1
+            else:
+                first_token_ms.append((first - start) * 1000)
+                stream_total_ms.append((end - start) * 1000)
+                tokens_per_sec.append(tokens / (end - first) if end > first else 0.0)
+
+            start = time.perf_counter()
+            await llm_service.process_query(request, None)
+            blocking_ms.append((time.perf_counter() - start) * 1000)
+    finally:
+        # Started lazily by the first stored turn; stop it on this loop
+        await llm_service.conversation_writer.stop()
+
+    return {
+        "empty_streams": empty_streams,
+        "stream_first_token_ms": _summary(first_token_ms),
+        "stream_total_ms": _summary(stream_total_ms),
+        "stream_tokens_per_sec": _summary(tokens_per_sec),
+        "blocking_first_byte_ms": _summary(blocking_ms)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    from config.settings import Settings
+    from services.chroma_service import ChromaService
+    from services.llm_service import LLMService
+
+    with MockOllamaServer(
+        first_token_delay=args.first_token_ms / 1000,
+        token_delay=args.token_ms / 1000,
+        num_tokens=args.tokens
+    ) as ollama, tempfile.TemporaryDirectory() as chroma_dir:
+        settings = Settings(ollama_base_url=ollama.url, chroma_persist_dir=chroma_dir)
+        llm_service = LLMService(settings.llm_model, ChromaService(settings), settings.ollama_base_url)
+        report = asyncio.run(_run(llm_service, args.runs))
+    print(json.dumps({"runs": args.runs, "tokens": args.tokens, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+# Replays a weighted request mix against the API and reports latency
+# percentiles, throughput, errors and server memory per scenario.
+#
+# By default the API is started in a subprocess with Ollama and the
+# open-meteo archive replaced by local mock servers, so runs are repeatable
+# and never touch the network:
+#
+#   python -m benchmarks.bench_load --mix benchmarks/mixes/default.jsonl \
+#       --concurrency 16 --duration 60 --output run.json
+#   python -m benchmarks.bench_load ... --compare run.json --max-regression 0.1
+#
+# --url points it at an already running server instead.
+#
+# Mix files are JSONL, one scenario per line:
+#   {"name": "chat_text", "weight": 40, "method": "POST", "path": "/api/v1/chat",
+#    "form": {"country": "india"}, "vary": {"question": ["...", "..."]},
+#    "files": {"image": "synthetic:image"}, "params": {"country": "kenya"}}
+# "vary" fields are picked at random per request (query params for GETs). File values are
+# "synthetic:image", "synthetic:audio" or "file:<path>".
+#
+# The started server transcribes with the offline sphinx backend. The default
+# mix has no audio scenario because a synthetic tone never transcribes; add one
+# with a real recording to measure /chat/audio:
+#   {"name": "chat_audio", "weight": 5, "path": "/api/v1/chat/audio",
+#    "files": {"audio_file": "file:question.wav"}}
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from typing import Dict, List, Optional
+from benchmarks.mock_servers import MockOllamaServer, MockWeatherArchiveServer
+
+_CONTENT_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".wav": "audio/wav", ".zip": "application/zip"}
+
+
+def load_mix(path: str) -> List[Dict]:
+    scenarios = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                scenario = json.loads(line)
+                scenario.setdefault("method", "POST")
+                scenario.setdefault("weight", 1)
+                scenarios.append(scenario)
+    if not scenarios:
+        raise ValueError(f"No scenarios in {path}")
+    return scenarios
+
+
+def synthetic_image(seed: int = 0, size: int = 256) -> bytes:
+    # A noisy green "leaf" with brown spots; realistic enough to exercise decode and predict
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size), (40 + rng.randint(0, 30), 120 + rng.randint(0, 40), 40))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y, r = rng.randint(0, size), rng.randint(0, size), rng.randint(4, 20)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=(110 + rng.randint(0, 40), 70, 30))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def synthetic_audio(seconds: float = 1.5, rate: int = 16000) -> bytes:
+    # A valid 16-bit mono WAV (a tone); recognizers will reject it as speech,
+    # so use file:<path> with a real recording to measure successful STT
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        frames = bytearray()
+        for i in range(int(seconds * rate)):
+            value = int(8000 * math.sin(2 * math.pi * 220 * i / rate))
+            frames += value.to_bytes(2, "little", signed=True)
+        wav.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+class Payloads:
+    def __init__(self):
+        self._cache: Dict[str, tuple] = {}
+
+    def file(self, spec: str) -> tuple:
+        if spec not in self._cache:
+            if spec == "synthetic:image":
+                self._cache[spec] = ("leaf.jpg", synthetic_image(), "image/jpeg")
+            elif spec == "synthetic:audio":
+                self._cache[spec] = ("question.wav", synthetic_audio(), "audio/wav")
+            elif spec.startswith("file:"):
+                path = spec[len("file:"):]
+                with open(path, "rb") as f:
+                    content = f.read()
+                extension = os.path.splitext(path)[1].lower()
+                self._cache[spec] = (os.path.basename(path), content, _CONTENT_TYPES.get(extension, "application/octet-stream"))
+            else:
+                raise ValueError(f"Unknown file spec '{spec}'")
+        return self._cache[spec]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))
+    return round(values[index], 2)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[Dict]] = {}
+
+    def add(self, name: str, latency_ms: float, first_byte_ms: float, status: int, size: int, error: Optional[str]):
+        self.samples.setdefault(name, []).append({
+            "latency_ms": latency_ms,
+            "first_byte_ms": first_byte_ms,
+            "status": status,
+            "bytes": size,
+            "error": error
+        })
+
+    def summary(self, elapsed: float) -> Dict:
+        report = {}
+        everything = []
+        for name, samples in sorted(self.samples.items()):
+            report[name] = self._summarize(samples, elapsed)
+            everything.extend(samples)
+        report["_all"] = self._summarize(everything, elapsed)
+        return report
+
+    @staticmethod
+    def _summarize(samples: List[Dict], elapsed: float) -> Dict:
+        ok = [s for s in samples if s["error"] is None]
+        latencies = [s["latency_ms"] for s in ok]
+        first_bytes = [s["first_byte_ms"] for s in ok]
+        statuses: Dict[str, int] = {}
+        for s in samples:
+            statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+        errors: Dict[str, int] = {}
+        for s in samples:
+            if s["error"] is not None:
+                errors[s["error"]] = errors.get(s["error"], 0) + 1
+        return {
+            "requests": len(samples),
+            "errors": len(samples) - len(ok),
+            "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 0.5),
+                "p95": percentile(latencies, 0.95),
+                "p99": percentile(latencies, 0.99),
+                "max": round(max(latencies), 2) if latencies else None,
+                "mean": round(sum(latencies) / len(latencies), 2) if latencies else None
+            },
+            "first_byte_ms": {"p50": percentile(first_bytes, 0.5), "p95": percentile(first_bytes, 0.95)},
+            "statuses": statuses,
+            "top_errors": dict(sorted(errors.items(), key=lambda item: -item[1])[:3])
+        }
+
+
+async def _send(client, base_url: str, scenario: Dict, payloads: Payloads, rng: random.Random, recorder: Recorder):
+    data = dict(scenario.get("form", {}))
+    params = dict(scenario.get("params", {}))
+    # Varied fields go in the query string for GETs and the form body otherwise
+    varied = params if scenario["method"] == "GET" else data
+    for field, choices in scenario.get("vary", {}).items():
+        varied[field] = rng.choice(choices)
+    files = {field: payloads.file(spec) for field, spec in scenario.get("files", {}).items()}
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    status = 0
+    error = None
+    try:
+        async with client.stream(
+            scenario["method"],
+            base_url + scenario["path"],
+            params=params or None,
+            data=data or None,
+            files=files or None
+        ) as response:
+            status = response.status_code
+            async for chunk in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+                size += len(chunk)
+        if status >= 400:
+            error = f"HTTP {status}"
+    except Exception as e:
+        error = type(e).__name__
+    end = time.perf_counter()
+    recorder.add(
+        scenario["name"],
+        (end - start) * 1000,
+        ((first_byte or end) - start) * 1000,
+        status,
+        size,
+        error
+    )
+
+
+class MemorySampler:
+    # Samples the server's RSS in the background while a phase runs
+    def __init__(self, pid: Optional[int], interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        from utils.memory import rss_mb
+
+        while True:
+            value = rss_mb(self.pid)
+            if value is not None:
+                self.samples.append(value)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self) -> "MemorySampler":
+        if self.pid is not None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        if self._task is not None:
+            self._task.cancel()
+
+    def summary(self) -> Dict:
+        samples = self.samples
+        return {
+            "start": samples[0] if samples else None,
+            "peak": max(samples) if samples else None,
+            "end": samples[-1] if samples else None,
+            "growth": round(samples[-1] - samples[0], 1) if samples else None
+        }
+
+
+async def _drive(client, base_url: str, scenarios: List[Dict], concurrency: int, deadline: float,
+                 max_requests: int, payloads: Payloads, rng: random.Random, recorder: Recorder):
+    weights = [scenario["weight"] for scenario in scenarios]
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            scenario = rng.choices(scenarios, weights)[0]
+            await _send(client, base_url, scenario, payloads, rng, recorder)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def run_load(base_url: str, scenarios: List[Dict], concurrency: int, duration: float, max_requests: int,
+                   timeout: float, seed: int, server_pid: Optional[int], isolate_requests: int = 0) -> Dict:
+    # The mixed phase gives latency and throughput under realistic contention.
+    # Memory cannot be attributed to endpoints there, so with a known server
+    # pid each scenario is then replayed alone (isolate_requests requests) to
+    # measure its own RSS peak and growth.
+    import httpx
+
+    rng = random.Random(seed)
+    payloads = Payloads()
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        with MemorySampler(server_pid, interval=0.5) as sampler:
+            start = time.perf_counter()
+            await _drive(client, base_url, scenarios, concurrency, start + duration, max_requests, payloads, rng, recorder)
+            elapsed = time.perf_counter() - start
+        endpoints = recorder.summary(elapsed)
+
+        if server_pid is not None and isolate_requests:
+            for scenario in scenarios:
+                with MemorySampler(server_pid) as isolated:
+                    await _drive(client, base_url, [scenario], concurrency, math.inf, isolate_requests,
+                                 payloads, rng, Recorder())
+                if scenario["name"] in endpoints:
+                    endpoints[scenario["name"]]["server_rss_mb"] = isolated.summary()
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "endpoints": endpoints,
+        "server_rss_mb": sampler.summary()
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, env_overrides: Dict[str, str], ready_timeout: float) -> subprocess.Popen:
+    import urllib.error
+    import urllib.request
+
+    env = {**os.environ, **env_overrides}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env
+    )
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=2) as response:
+                report = json.load(response)
+        except urllib.error.HTTPError as e:
+            # 503 while starting; the body still says which components are loading or failed
+            report = json.load(e)
+        except (OSError, ValueError):
+            report = None
+        if report is not None:
+            if report.get("status") == "failed":
+                process.terminate()
+                failed = {
+                    name: status.get("error") for name, status in report["components"].items()
+                    if status["state"] == "failed"
+                }
+                raise RuntimeError(f"API server failed to load required components: {failed}")
+            if report.get("ready"):
+                if report.get("degraded"):
+                    print(f"Server is degraded, unavailable: {', '.join(report['degraded'])}", file=sys.stderr)
+                return process
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"API server not ready after {ready_timeout}s")
+
+
+def compare(current: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    # A regression is p95 latency or per-endpoint peak RSS up, or throughput down,
+    # by more than max_regression
+    regressions = []
+    print(f"{'endpoint':<20} {'p95 ms (base -> now)':>26} {'rps (base -> now)':>22} {'errors':>14}")
+    for name, now in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if base is None:
+            continue
+        base_p95, now_p95 = base["latency_ms"]["p95"], now["latency_ms"]["p95"]
+        base_rps, now_rps = base["throughput_rps"], now["throughput_rps"]
+        print(f"{name:<20} {str(base_p95):>12} -> {str(now_p95):<11} {base_rps:>9} -> {now_rps:<9} "
+              f"{base['error_rate']:>6} -> {now['error_rate']}")
+        if base_p95 and now_p95 and now_p95 > base_p95 * (1 + max_regression):
+            regressions.append(f"{name}: p95 {base_p95}ms -> {now_p95}ms")
+        if base_rps and now_rps < base_rps * (1 - max_regression):
+            regressions.append(f"{name}: throughput {base_rps} -> {now_rps} req/s")
+        if now["error_rate"] > base["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {base['error_rate']} -> {now['error_rate']}")
+        base_peak = (base.get("server_rss_mb") or {}).get("peak")
+        now_peak = (now.get("server_rss_mb") or {}).get("peak")
+        if base_peak and now_peak and now_peak > base_peak * (1 + max_regression):
+            regressions.append(f"{name}: peak RSS {base_peak} -> {now_peak} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mix", default=os.path.join(os.path.dirname(__file__), "mixes", "default.jsonl"))
+    parser.add_argument("--url", help="Target a running server instead of starting one with mocks")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to generate load")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = duration only)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--isolate-requests", type=int, default=50,
+                        help="Requests per scenario replayed alone after the mix to measure per-endpoint memory (0 = skip)")
+    parser.add_argument("--server-pid", type=int, help="With --url, the server's pid (same host) for memory sampling")
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=150)
+    parser.add_argument("--weather-delay-ms", type=float, default=100)
+    parser.add_argument("--weather-error-rate", type=float, default=0.0)
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra settings for the started server, e.g. --env DISEASE_MODEL_BACKEND=tflite")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.1)
+    args = parser.parse_args()
+
+    scenarios = load_mix(args.mix)
+    run_args = (scenarios, args.concurrency, args.duration, args.requests, args.timeout, args.seed)
+    isolate = args.isolate_requests
+    config = {
+        "mix": args.mix,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "seed": args.seed
+    }
+
+    if args.url:
+        report = asyncio.run(run_load(args.url.rstrip("/"), *run_args, args.server_pid, isolate))
+    else:
+        ollama = MockOllamaServer(
+            first_token_delay=args.first_token_ms / 1000,
+            token_delay=args.token_ms / 1000,
+            num_tokens=args.tokens
+        ).start()
+        weather = MockWeatherArchiveServer(
+            delay=args.weather_delay_ms / 1000,
+            error_rate=args.weather_error_rate
+        ).start()
+        config["mocks"] = {
+            "first_token_ms": args.first_token_ms,
+            "token_ms": args.token_ms,
+            "tokens": args.tokens,
+            "weather_delay_ms": args.weather_delay_ms,
+            "weather_error_rate": args.weather_error_rate
+        }
+        with tempfile.TemporaryDirectory() as workdir:
+            port = _free_port()
+            env = {
+                "OLLAMA_BASE_URL": ollama.url,
+                "WEATHER_ARCHIVE_URL": weather.url,
+                "WEATHER_ARCHIVE_DIR": os.path.join(workdir, "weather"),
+                "CHROMA_PERSIST_DIR": os.path.join(workdir, "chroma"),
+                "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+                "WARMUP_MODE": "eager",
+                # Google STT would send every audio request over the network. Without
+                # pocketsphinx installed audio fails to load and the server runs degraded.
+                "AUDIO_STT_BACKEND": "sphinx"
+            }
+            env.update(item.split("=", 1) for item in args.env)
+            server = start_server(port, env, args.ready_timeout)
+            try:
+                report = asyncio.run(run_load(f"http://127.0.0.1:{port}", *run_args, server.pid, isolate))
+            finally:
+                server.terminate()
+                server.wait(30)
+                ollama.stop()
+                weather.stop()
+        report["upstream_requests"] = {"ollama": dict(ollama.requests), "weather_archive": weather.requests}
+
+    report = {"config": config, **report}
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+        print("No regressions beyond", args.max_regression)
+
+
+if __name__ == "__main__":
+    main()
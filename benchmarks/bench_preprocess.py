@@ -0,0 +1,91 @@
+# Compares the legacy temp-file preprocessing path against the in-memory
+# decoder used by DiseaseService. Each path runs in a fresh process so the
+# reported peak RSS is not polluted by the other one.
+#
+#   python -m benchmarks.bench_preprocess --image leaf.jpg --iterations 200
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import resource
+import statistics
+import tempfile
+import time
+import numpy as np
+from PIL import Image
+
+
+def _synthetic_jpeg(width: int, height: int) -> bytes:
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def _legacy(content: bytes, temp_dir: str) -> np.ndarray:
+    path = os.path.join(temp_dir, "upload.jpg")
+    with open(path, "wb") as f:
+        f.write(content)
+    try:
+        image = Image.open(path)
+        image = image.resize((128, 128))
+        return np.expand_dims(np.array(image) / 255.0, axis=0)
+    finally:
+        os.remove(path)
+
+
+def _run(mode: str, content: bytes, iterations: int, results):
+    from services.image_preprocessor import ImagePreprocessor
+
+    preprocessor = ImagePreprocessor((128, 128))
+    buffer = np.empty((1, *preprocessor.input_shape), dtype=np.float32)
+    temp_dir = tempfile.mkdtemp()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if mode == "legacy":
+            _legacy(content, temp_dir)
+        else:
+            preprocessor.normalize(preprocessor.decode(content), out=buffer[0])
+        timings.append((time.perf_counter() - start) * 1000)
+    os.rmdir(temp_dir)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings.sort()
+    results.put({
+        "mode": mode,
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "peak_rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", help="Image to decode (defaults to a synthetic 4000x3000 JPEG)")
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            content = f.read()
+    else:
+        content = _synthetic_jpeg(4000, 3000)
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    report = []
+    for mode in ("legacy", "in_memory"):
+        process = ctx.Process(target=_run, args=(mode, content, args.iterations, results))
+        process.start()
+        report.append(results.get())
+        process.join()
+    print(json.dumps({"image_bytes": len(content), "iterations": args.iterations, "results": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Startup time and resident memory of the API.
+#
+# "legacy" rebuilds the services the way the routers used to at import time
+# (two DiseaseService and two WeatherService instances, everything eager);
+# the other modes start main.app through its lifespan with the shared
+# ServiceContainer. Each mode runs in a fresh process.
+#
+#   python -m benchmarks.bench_startup --modes legacy eager background lazy
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import time
+
+
+def _legacy(results):
+    from utils.memory import rss_mb
+
+    start = time.perf_counter()
+    from config.settings import Settings
+    from services.audio_service import AudioService
+    from services.chroma_service import ChromaService
+    from services.disease_service import DiseaseService
+    from services.llm_service import LLMService
+    from services.weather_service import WeatherService
+
+    settings = Settings()
+    imported = time.perf_counter()
+    chroma_service = ChromaService(settings)
+    LLMService(settings.llm_model, chroma_service, settings.ollama_base_url)
+    WeatherService(settings)
+    AudioService(settings)
+    DiseaseService(settings)
+    WeatherService(settings)
+    DiseaseService(settings)
+    results.put({
+        "mode": "legacy",
+        "import_seconds": round(imported - start, 3),
+        "ready_seconds": round(time.perf_counter() - start, 3),
+        "rss_mb": rss_mb()
+    })
+
+
+def _container(mode: str, results):
+    os.environ["WARMUP_MODE"] = mode
+    from utils.memory import rss_mb
+
+    start = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    import_rss = rss_mb()
+
+    async def run():
+        async with main.app.router.lifespan_context(main.app):
+            started = time.perf_counter()
+            container = main.app.state.container
+            # warmup_seconds is set once warm-up has finished, even if a component failed
+            while not container.ready and container.warmup_seconds is None:
+                await asyncio.sleep(0.05)
+            ready = time.perf_counter()
+            return started, ready, container.report()
+
+    started, ready, report = asyncio.run(run())
+    results.put({
+        "mode": mode,
+        "import_seconds": round(imported - start, 3),
+        "import_rss_mb": import_rss,
+        "serving_seconds": round(started - start, 3),
+        "ready_seconds": round(ready - start, 3) if report["ready"] else None,
+        "failed": [name for name, status in report["components"].items() if status["state"] == "failed"],
+        "degraded": report["degraded"],
+        "rss_mb": report["rss_mb"],
+        "components": report["components"]
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", nargs="+", default=["legacy", "eager", "background", "lazy"])
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    report = []
+    for mode in args.modes:
+        target = _legacy if mode == "legacy" else _container
+        process = ctx.Process(target=target, args=(results,) if mode == "legacy" else (mode, results))
+        process.start()
+        process.join()
+        report.append(results.get() if process.exitcode == 0 else {"mode": mode, "error": f"exit code {process.exitcode}"})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# Local stand-ins for upstream services so benchmarks never touch the network.
+#
+#   python -m benchmarks.mock_servers --ollama-port 11500 --weather-port 11501
+import argparse
+import hashlib
+import json
+import math
+import random
+import struct
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_WORDS = (
+    "Late blight spreads quickly in cool wet weather so remove infected leaves "
+    "apply a copper based fungicide improve air circulation and avoid overhead irrigation"
+).split()
+
+
+def fake_embedding(text: str, dim: int) -> list:
+    # Deterministic pseudo-random unit-ish vector derived from the text
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend(v / 2**31 - 1.0 for v in struct.unpack("<8I", digest))
+        counter += 1
+    return values[:dim]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockOllamaServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        first_token_delay: float = 0.2,
+        token_delay: float = 0.02,
+        num_tokens: int = 200,
+        embed_delay: float = 0.01,
+        embed_dim: int = 256
+    ):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.num_tokens = num_tokens
+        self.embed_delay = embed_delay
+        self.embed_dim = embed_dim
+        self.requests = {"generate": 0, "embed": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(_Handler):
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-mock"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": []})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                payload = self._read_json()
+                if self.path == "/api/generate":
+                    server.requests["generate"] += 1
+                    server._generate(self, payload)
+                elif self.path in ("/api/embed", "/api/embeddings"):
+                    server.requests["embed"] += 1
+                    server._embed(self, payload)
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+        return Handler
+
+    def _tokens(self):
+        for i in range(self.num_tokens):
+            yield _WORDS[i % len(_WORDS)] + " "
+
+    def _generate(self, handler: _Handler, payload: dict):
+        model = payload.get("model", "mock")
+        time.sleep(self.first_token_delay)
+        if not payload.get("stream", True):
+            time.sleep(self.token_delay * max(self.num_tokens - 1, 0))
+            handler._send_json({
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "response": "".join(self._tokens()),
+                "done": True
+            })
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write(line: dict):
+            data = (json.dumps(line) + "\n").encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+
+        for i, token in enumerate(self._tokens()):
+            if i:
+                time.sleep(self.token_delay)
+            write({"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "response": token, "done": False})
+        write({
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "eval_count": self.num_tokens
+        })
+        handler.wfile.write(b"0\r\n\r\n")
+
+    def _embed(self, handler: _Handler, payload: dict):
+        time.sleep(self.embed_delay)
+        if handler.path == "/api/embeddings":
+            handler._send_json({"embedding": fake_embedding(payload.get("prompt", ""), self.embed_dim)})
+            return
+        inputs = payload.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        handler._send_json({
+            "model": payload.get("model", "mock"),
+            "embeddings": [fake_embedding(text, self.embed_dim) for text in inputs]
+        })
+
+    def start(self) -> "MockOllamaServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class MockWeatherArchiveServer:
+    # Open-Meteo archive API stand-in: deterministic seasonal daily series for
+    # any coordinates. delay, error_rate and fail_requests let tests exercise
+    # timeouts, retries and the circuit breaker.
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        delay: float = 0.05,
+        error_rate: float = 0.0,
+        fail_requests: int = 0
+    ):
+        self.delay = delay
+        self.error_rate = error_rate
+        self.fail_requests = fail_requests
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/archive"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(_Handler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path != "/v1/archive":
+                    self._send_json({"error": "not found"}, 404)
+                    return
+                with server._lock:
+                    server.requests += 1
+                    fail = server.fail_requests > 0
+                    if fail:
+                        server.fail_requests -= 1
+                time.sleep(server.delay)
+                if fail or random.random() < server.error_rate:
+                    self._send_json({"error": True, "reason": "mock upstream failure"}, 503)
+                    return
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                try:
+                    self._send_json({"daily": server.daily(query)})
+                except (KeyError, ValueError) as e:
+                    self._send_json({"error": True, "reason": str(e)}, 400)
+
+        return Handler
+
+    @staticmethod
+    def daily(query: dict) -> dict:
+        start = date.fromisoformat(query["start_date"])
+        end = date.fromisoformat(query["end_date"])
+        latitude = float(query["latitude"])
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        # Warmer near the equator, seasonal swing that flips hemisphere
+        base = 30 - abs(latitude) * 0.4
+        swing = 8 * (1 if latitude >= 0 else -1)
+        max_temp, min_temp, humidity = [], [], []
+        for day in days:
+            season = math.sin(2 * math.pi * (day.timetuple().tm_yday - 100) / 365.25)
+            max_temp.append(round(base + swing * season + 4, 1))
+            min_temp.append(round(base + swing * season - 6, 1))
+            humidity.append(round(60 - 15 * season, 1))
+        return {
+            "time": [day.isoformat() for day in days],
+            "temperature_2m_max": max_temp,
+            "temperature_2m_min": min_temp,
+            "relative_humidity_2m_mean": humidity
+        }
+
+    def start(self) -> "MockWeatherArchiveServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-weather", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--first-token-ms", type=float, default=200)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--weather-port", type=int, default=11501)
+    parser.add_argument("--weather-delay-ms", type=float, default=50)
+    parser.add_argument("--weather-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    ollama = MockOllamaServer(
+        args.host, args.ollama_port,
+        first_token_delay=args.first_token_ms / 1000,
+        token_delay=args.token_ms / 1000,
+        num_tokens=args.tokens
+    ).start()
+    weather = MockWeatherArchiveServer(
+        args.host, args.weather_port,
+        delay=args.weather_delay_ms / 1000,
+        error_rate=args.weather_error_rate
+    ).start()
+    print(f"Mock Ollama listening on {ollama.url}")
+    print(f"Mock weather archive listening on {weather.url} (set WEATHER_ARCHIVE_URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        ollama.stop()
+        weather.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,74 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
-    ffmpeg_path: str = r"C:\ffmpeg\bin"  
     chroma_persist_dir: str = "chroma_storage"
     chroma_collection_name: str = "conversation_memory"
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "embedding_cache.sqlite3"
+    conversation_queue_max_pending: int = 1000
+    conversation_flush_size: int = 32
+    conversation_flush_interval: float = 2.0
+    memory_scope: str = "session"  # session | global; session limits retrieval to the caller's session_id
+    memory_retention_days: float = 0  # 0 = keep forever
+    memory_max_chunks_per_session: int = 0  # 0 = unlimited; never applied to requests without a session_id
+    memory_duplicate_similarity: float = 0.95  # 0 disables near-duplicate removal
+    memory_compaction_interval_seconds: float = 3600  # 0 disables the background job
+    memory_stats_history: int = 48
+    disease_knowledge_index: str = "knowledge/disease_index.json"
+    disease_knowledge_collection: str = "disease_knowledge"
+    disease_knowledge_search: bool = False
     llm_model: str = "llama3.2"
+    ollama_base_url: str = "http://localhost:11434"
+    context_retrieval_timeout: float = 3.0
+    context_weather_timeout: float = 5.0
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 2048
+    response_cache_ttl_seconds: float = 21600
+    response_cache_similarity: float = 0.95  # cosine similarity needed to reuse a cached answer
+    response_cache_bypass_with_history: bool = True
+    prompt_budget_tokens: int = 1536  # keep below the model's num_ctx minus room for the answer
+    prompt_chars_per_token: float = 4.0
+    prompt_dedupe_similarity: float = 0.8
     weather_api_base_url: str = "http://localhost:8000"  # Internal base URL
+    warmup_mode: str = "background"  # eager | background | lazy
+    metrics_enabled: bool = True  # stage timings and /metrics; off leaves one flag check per instrumented call
+    weather_archive_url: str = "https://archive-api.open-meteo.com/v1/archive"
+    weather_archive_dir: str = "weather_archive"
+    weather_sync_interval_seconds: float = 3600
+    weather_request_timeout: float = 30.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_retries: int = 2
+    http_backoff_base_seconds: float = 0.5
+    http_backoff_max_seconds: float = 8.0
+    http_breaker_failure_threshold: int = 5
+    http_breaker_reset_seconds: float = 30.0
+    http_slow_call_seconds: float = 10.0  # slower successful calls count as breaker failures
+    disease_batch_max_size: int = 16
+    disease_batch_max_wait_ms: float = 5.0
+    disease_model_path: str = "trained_plant_disease_model.keras"
+    disease_model_backend: str = "keras"  # keras | tflite
+    disease_tflite_model_path: str = "trained_plant_disease_model.tflite"
+    disease_inference_processes: int = 0  # 0 = run the model inside the API process
+    disease_inference_threads_per_process: int = 0  # 0 = runtime default
+    disease_cache_enabled: bool = True
+    disease_cache_top_k: int = 5
+    disease_cache_max_entries: int = 10000
+    disease_cache_max_mb: int = 16
+    disease_cache_ttl_seconds: float = 86400
+    disease_cache_perceptual: bool = False
+    disease_survey_chunk_size: int = 16
+    disease_survey_max_images: int = 1000
+    disease_survey_max_image_mb: float = 20
+    disease_survey_max_compression_ratio: float = 100  # larger zip members are rejected as likely zip bombs
+    audio_stt_backend: str = "google"  # google | sphinx | vosk (sphinx and vosk run offline)
+    audio_tts_backend: str = "pyttsx3"
+    audio_language: str = "en-US"
+    audio_vosk_model_path: str = "vosk-model"
+    audio_tts_rate: int = 0  # words per minute, 0 = engine default
+    audio_min_duration_ms: int = 500
+    audio_max_duration_seconds: float = 60
+    audio_sentence_min_chars: int = 40
 
     class Config:
         env_file = ".env"
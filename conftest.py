@@ -0,0 +1 @@
+# Makes the repository root importable (services, utils, config) for tests/
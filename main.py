@@ -1,18 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from api import chat, weather, disease  
+from api import chat, weather, disease, health, metrics as metrics_api
+from api.middleware import RequestContextMiddleware
 from config.settings import Settings
+from services.container import ServiceContainer
+from utils import metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = Settings()
+    metrics.configure(settings.metrics_enabled)
+    # One container per app: every heavy service is loaded exactly once
+    app.state.container = ServiceContainer(settings)
+    metrics.REGISTRY.add_collector(app.state.container.collect_metrics)
+    await app.state.container.start()
+    yield
+    # Flushes queued conversation turns to Chroma before exiting
+    await app.state.container.shutdown()
 
 # Initialize the FastAPI app
 app = FastAPI(
     title="Agri-Weather Solution",
     description="A scalable solution combining agriculture LLM expertise, weather data analysis, and plant disease detection",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Request IDs for log correlation, plus per-route latency when metrics are enabled
+app.add_middleware(RequestContextMiddleware)
+
 # Include API routers from the api/ directory
 app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
 app.include_router(weather.router, prefix="/api/v1", tags=["Weather"])
 app.include_router(disease.router, prefix="/api/v1", tags=["Disease"])  
+app.include_router(health.router, tags=["Health"])
+app.include_router(metrics_api.router, tags=["Metrics"])
 
 # Entry point for running the application
 if __name__ == "__main__":
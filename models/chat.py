@@ -6,6 +6,7 @@ class ChatRequest(BaseModel):
     conversation_history: Optional[List[str]] = None
     detected_disease: Optional[str] = None
     country: Optional[str] = None
+    session_id: Optional[str] = None
     image: Optional[bytes] = None
 
 class ChatResponse(BaseModel):
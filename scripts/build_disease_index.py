@@ -0,0 +1,53 @@
+# Builds knowledge/disease_index.json from the Markdown files in
+# knowledge/sources, and optionally (re)builds the Chroma collection used for
+# free-text disease questions.
+#
+#   python -m scripts.build_disease_index [--chroma]
+import argparse
+import json
+import os
+from config.settings import Settings
+from services.disease_knowledge import SECTIONS, build_index, format_entry
+from services.disease_labels import CLASS_LABELS
+
+
+def build_collection(settings: Settings, entries: dict):
+    from langchain.schema import Document
+    from services.chroma_service import ChromaService
+
+    chroma_service = ChromaService(settings)
+    chroma_service.open_collection(settings.disease_knowledge_collection).delete_collection()
+    store = chroma_service.open_collection(settings.disease_knowledge_collection)
+    docs, ids = [], []
+    for label, entry in entries.items():
+        docs.append(Document(page_content=format_entry(entry), metadata={"label": label, "section": "all"}))
+        ids.append(f"{label}:all")
+        for section in SECTIONS:
+            if entry[section]:
+                text = f"{entry['name']} - {section}: " + " ".join(entry[section])
+                docs.append(Document(page_content=text, metadata={"label": label, "section": section}))
+                ids.append(f"{label}:{section}")
+    store.add_documents(docs, ids=ids)
+    print(f"Indexed {len(docs)} documents into Chroma collection '{settings.disease_knowledge_collection}'")
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", default=os.path.join("knowledge", "sources"))
+    parser.add_argument("--output", default=settings.disease_knowledge_index)
+    parser.add_argument("--chroma", action="store_true", help="Also rebuild the disease knowledge Chroma collection")
+    args = parser.parse_args()
+
+    index = build_index(args.sources, CLASS_LABELS)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Wrote {len(index['entries'])} entries to {args.output}")
+
+    if args.chroma:
+        build_collection(settings, index["entries"])
+
+
+if __name__ == "__main__":
+    main()
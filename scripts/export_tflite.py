@@ -0,0 +1,122 @@
+# Converts the Keras plant disease model to TFLite and checks the result
+# against the original on a sample set.
+#
+#   python -m scripts.export_tflite --quantization float16 --sample-dir samples/
+#
+# Quantization modes:
+#   none     float32 weights and activations
+#   dynamic  int8 weights, float activations (no calibration data needed)
+#   float16  float16 weights
+#   int8     int8 weights and activations, calibrated on --sample-dir images
+#            (float32 model inputs/outputs are kept)
+import argparse
+import json
+import os
+import numpy as np
+from config.settings import Settings
+from services.disease_backends import KerasBackend, TFLiteBackend
+from services.image_preprocessor import ImagePreprocessor
+
+QUANTIZATION_MODES = ("none", "dynamic", "float16", "int8")
+_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def load_samples(sample_dir: str, limit: int) -> np.ndarray:
+    # Walks sample_dir recursively so a PlantVillage-style class-per-folder layout works
+    preprocessor = ImagePreprocessor((128, 128))
+    arrays = []
+    for root, _, files in sorted(os.walk(sample_dir)):
+        for name in sorted(files):
+            if not name.lower().endswith(_IMAGE_EXTENSIONS):
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                arrays.append(preprocessor.normalize(preprocessor.decode(f.read())))
+            if len(arrays) >= limit:
+                return np.stack(arrays)
+    if not arrays:
+        raise ValueError(f"No images found in {sample_dir}")
+    return np.stack(arrays)
+
+
+def random_samples(count: int) -> np.ndarray:
+    return np.random.default_rng(0).random((count, 128, 128, 3), dtype=np.float32)
+
+
+def export(model_path: str, output_path: str, quantization: str, samples: np.ndarray) -> int:
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        def representative_dataset():
+            for sample in samples:
+                yield [sample[np.newaxis]]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    return len(tflite_model)
+
+
+def check_parity(keras_path: str, tflite_path: str, samples: np.ndarray, batch_size: int = 16) -> dict:
+    keras_backend = KerasBackend(keras_path)
+    tflite_backend = TFLiteBackend(tflite_path)
+    keras_probs, tflite_probs = [], []
+    for start in range(0, len(samples), batch_size):
+        batch = samples[start:start + batch_size]
+        keras_probs.append(keras_backend.predict(batch))
+        tflite_probs.append(tflite_backend.predict(batch))
+    keras_probs = np.concatenate(keras_probs)
+    tflite_probs = np.concatenate(tflite_probs)
+    keras_top = keras_probs.argmax(axis=1)
+    tflite_top = tflite_probs.argmax(axis=1)
+    keras_top3 = np.argsort(keras_probs, axis=1)[:, -3:]
+    return {
+        "samples": int(len(samples)),
+        "top1_agreement": float((keras_top == tflite_top).mean()),
+        "top1_in_keras_top3": float(np.mean([t in row for t, row in zip(tflite_top, keras_top3)])),
+        "max_abs_prob_diff": float(np.abs(keras_probs - tflite_probs).max()),
+        "mean_abs_prob_diff": float(np.abs(keras_probs - tflite_probs).mean())
+    }
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.disease_model_path)
+    parser.add_argument("--output", default=settings.disease_tflite_model_path)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default="float16")
+    parser.add_argument("--sample-dir", help="Leaf images used for int8 calibration and the parity check")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="Exit non-zero if top-1 agreement with the Keras model is lower")
+    parser.add_argument("--skip-export", action="store_true", help="Only run the parity check")
+    args = parser.parse_args()
+
+    if args.sample_dir:
+        samples = load_samples(args.sample_dir, args.samples)
+    else:
+        if args.quantization == "int8" and not args.skip_export:
+            parser.error("--sample-dir is required for int8 calibration")
+        # Random inputs still catch numeric drift, but real leaves are needed for accuracy parity
+        samples = random_samples(min(args.samples, 64))
+
+    if not args.skip_export:
+        size = export(args.model, args.output, args.quantization, samples)
+        print(f"Wrote {args.output} ({size / (1024 * 1024):.1f} MB, quantization={args.quantization})")
+
+    report = check_parity(args.model, args.output, samples)
+    report["keras_size_mb"] = round(os.path.getsize(args.model) / (1024 * 1024), 1)
+    report["tflite_size_mb"] = round(os.path.getsize(args.output) / (1024 * 1024), 1)
+    print(json.dumps(report, indent=2))
+    if report["top1_agreement"] < args.min_agreement:
+        raise SystemExit(f"Top-1 agreement {report['top1_agreement']:.3f} is below {args.min_agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,42 +1,55 @@
+import asyncio
+import io
+import wave
+from concurrent.futures import ThreadPoolExecutor
 import speech_recognition as sr
-import pyttsx3
-from pydub import AudioSegment
-from pathlib import Path
-import tempfile
-import base64
+from config.settings import Settings
+from services.speech_backends import load_stt, load_tts
 from utils.logging import setup_logging
+from utils.metrics import timed
 
 logger = setup_logging()
 
+WAV_CONTENT_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave")
+
+
 class AudioService:
-    def __init__(self):
+    def __init__(self, settings: Settings):
         self.recognizer = sr.Recognizer()
-        self.tts_engine = pyttsx3.init()
-
-    def speech_to_text(self, audio_path: str) -> str:
-        with sr.AudioFile(audio_path) as source:
-            audio_data = self.recognizer.record(source)
-            try:
-                return self.recognizer.recognize_google(audio_data, language="en-US")
-            except sr.UnknownValueError:
-                raise ValueError("Could not understand audio")
-            except sr.RequestError as e:
-                raise RuntimeError(f"Speech recognition error: {str(e)}")
-
-    def text_to_speech(self, text: str, output_path: str) -> str:
-        self.tts_engine.save_to_file(text, output_path)
-        self.tts_engine.runAndWait()
-        with open(output_path, "rb") as audio_file:
-            audio_bytes = audio_file.read()
-        return base64.b64encode(audio_bytes).decode("utf-8")
-
-    def validate_audio(self, audio_file: bytes, content_type: str) -> str:
-        if content_type != "audio/wav":
+        self.stt = load_stt(settings.audio_stt_backend, settings.audio_language, settings.audio_vosk_model_path)
+        self.min_duration_ms = settings.audio_min_duration_ms
+        self.max_duration_seconds = settings.audio_max_duration_seconds
+        # TTS engines keep thread-affine state, so one dedicated thread owns the
+        # engine and synthesizes requests in submission order
+        self._tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self.tts = self._tts_executor.submit(load_tts, settings.audio_tts_backend, settings.audio_tts_rate).result()
+        self.media_type = self.tts.media_type
+
+    def validate_audio(self, audio_file: bytes, content_type: str) -> sr.AudioData:
+        if content_type not in WAV_CONTENT_TYPES:
             raise ValueError("Only WAV audio supported")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_audio:
-            tmp_audio.write(audio_file)
-            tmp_path = tmp_audio.name
-        audio = AudioSegment.from_wav(tmp_path)
-        if len(audio) < 500:
-            raise ValueError("Audio too short (min 0.5 seconds)")
-        return tmp_path
\ No newline at end of file
+        try:
+            with wave.open(io.BytesIO(audio_file)) as wav:
+                duration_ms = wav.getnframes() * 1000 / wav.getframerate()
+        except (wave.Error, EOFError) as e:
+            raise ValueError(f"Invalid WAV audio: {str(e)}")
+        if duration_ms < self.min_duration_ms:
+            raise ValueError(f"Audio too short (min {self.min_duration_ms / 1000:g} seconds)")
+        if duration_ms > self.max_duration_seconds * 1000:
+            raise ValueError(f"Audio too long (max {self.max_duration_seconds:g} seconds)")
+        with sr.AudioFile(io.BytesIO(audio_file)) as source:
+            return self.recognizer.record(source)
+
+    @timed("audio.stt")
+    def speech_to_text(self, audio_file: bytes, content_type: str) -> str:
+        return self.stt.transcribe(self.validate_audio(audio_file, content_type))
+
+    async def transcribe(self, audio_file: bytes, content_type: str) -> str:
+        return await asyncio.to_thread(self.speech_to_text, audio_file, content_type)
+
+    @timed("audio.tts")
+    async def synthesize(self, text: str) -> bytes:
+        return await asyncio.wrap_future(self._tts_executor.submit(self.tts.synthesize, text))
+
+    def close(self):
+        self._tts_executor.shutdown(wait=True, cancel_futures=True)
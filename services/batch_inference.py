@@ -0,0 +1,106 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Sequence
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+_STOP = object()
+
+
+class BatchInferenceEngine:
+    # Collects concurrent predict requests into micro-batches and runs them on
+    # a dedicated worker thread so the asyncio loop never blocks on the model.
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "inference",
+        num_workers: int = 1
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0.0) / 1000.0
+        self.name = name
+        # Each worker thread forms and runs its own batches; more than one
+        # only helps when batch_fn releases the GIL or hands off to processes.
+        self.num_workers = max(num_workers, 1)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self):
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} batcher has been shut down")
+            if not any(thread.is_alive() for thread in self._threads):
+                self._threads = [
+                    threading.Thread(target=self._run, name=f"{self.name}-batcher-{i}", daemon=True)
+                    for i in range(self.num_workers)
+                ]
+                for thread in self._threads:
+                    thread.start()
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            self._stopped = True
+            threads = self._threads
+            self._threads = []
+            # Requests already queued are still served before the workers stop
+            for thread in threads:
+                self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, item: Any) -> Future:
+        if not self._threads:
+            self.start()
+        future: Future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} batcher has been shut down")
+            self._queue.put((item, future))
+        return future
+
+    async def predict(self, item: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _collect(self, first) -> List:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [e for e in self._collect(entry) if e[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self.batch_fn([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch inference error ({len(batch)} items): {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
@@ -1,47 +1,235 @@
 from langchain_chroma import Chroma
 from langchain_ollama import OllamaEmbeddings
+from services.embedding_cache import CachedEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from collections import deque
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import os
+import time
+import numpy as np
 from config.settings import Settings
 from utils.logging import setup_logging
+from utils.metrics import timed
 
 logger = setup_logging()
 
+# Partition for turns stored without a session ID
+NO_SESSION = ""
+MEMORY_SCOPES = ("session", "global")
+
 class ChromaService:
     def __init__(self, settings: Settings):
-        embeddings = OllamaEmbeddings(model=settings.llm_model)
+        embeddings = OllamaEmbeddings(model=settings.llm_model, base_url=settings.ollama_base_url)
+        if settings.embedding_cache_enabled:
+            embeddings = CachedEmbeddings(embeddings, settings.llm_model, settings.embedding_cache_path)
+        self.embeddings = embeddings
         self.vectorstore = Chroma(
             collection_name=settings.chroma_collection_name,
             embedding_function=embeddings,
             persist_directory=settings.chroma_persist_dir
         )
+        self.persist_dir = settings.chroma_persist_dir
         self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        if settings.memory_scope not in MEMORY_SCOPES:
+            raise ValueError(f"memory_scope must be one of {', '.join(MEMORY_SCOPES)}")
+        # "session" confines retrieval to the caller's own turns; "global" searches everyone's
+        self.memory_scope = settings.memory_scope
+        self._query_ms = deque(maxlen=1000)
+        self.queries = 0
+        self.partitions: Optional[int] = None
+
+    def open_collection(self, collection_name: str) -> Chroma:
+        # Another collection in the same store, sharing the (cached) embeddings
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embeddings,
+            persist_directory=self.persist_dir
+        )
+
+    def store_conversation(self, user_input: str, response: str, session_id: Optional[str] = None):
+        self.store_conversations([(user_input, response, session_id)])
 
-    def store_conversation(self, user_input: str, response: str):
+    @timed("chroma.persist")
+    def store_conversations(self, turns: List[Tuple[str, str, Optional[str]]]):
+        # One split + embed + add for a whole batch of turns. Chroma persists
+        # automatically, so there is no separate persist() call.
         try:
-            docs = [
-                Document(
+            docs = []
+            for user_input, response, session_id in turns:
+                now = datetime.now()
+                # created_at is numeric so retention can delete with a range filter
+                metadata = {
+                    "timestamp": now.isoformat(),
+                    "created_at": now.timestamp(),
+                    "session_id": session_id or NO_SESSION
+                }
+                docs.append(Document(
                     page_content=user_input,
-                    metadata={"type": "user_input", "timestamp": datetime.now().isoformat()}
-                ),
-                Document(
+                    metadata={"type": "user_input", **metadata}
+                ))
+                docs.append(Document(
                     page_content=response,
-                    metadata={"type": "assistant_response", "timestamp": datetime.now().isoformat()}
-                )
-            ]
+                    metadata={"type": "assistant_response", **metadata}
+                ))
             split_docs = self.text_splitter.split_documents(docs)
             self.vectorstore.add_documents(split_docs)
-            self.vectorstore.persist()
-            logger.info("Stored conversation in ChromaDB")
+            logger.info(f"Stored {len(turns)} conversation turn(s) in ChromaDB")
         except Exception as e:
             logger.error(f"Error storing conversation: {str(e)}")
 
-    def retrieve_context(self, query: str, num_docs: int = 5) -> str:
+    @timed("chroma.retrieve")
+    def retrieve_documents(self, query: str, num_docs: int = 5, session_id: Optional[str] = None) -> List[str]:
+        start = time.perf_counter()
         try:
-            retriever = self.vectorstore.as_retriever(search_kwargs={"k": num_docs})
-            docs = retriever.get_relevant_documents(query)
-            return "\n".join([doc.page_content for doc in docs]) if docs else "No context found"
+            where = None
+            if self.memory_scope == "session":
+                where = {"session_id": session_id or NO_SESSION}
+            docs = self.vectorstore.similarity_search(query, k=num_docs, filter=where)
+            return [doc.page_content for doc in docs]
         except Exception as e:
             logger.error(f"Error retrieving context: {str(e)}")
-            return ""
\ No newline at end of file
+            return []
+        finally:
+            self.queries += 1
+            self._query_ms.append((time.perf_counter() - start) * 1000)
+
+    def retrieve_context(self, query: str, num_docs: int = 5, session_id: Optional[str] = None) -> str:
+        docs = self.retrieve_documents(query, num_docs, session_id)
+        return "\n".join(docs) if docs else "No context found"
+
+    # Maintenance, run by MemoryCompactor off the event loop
+
+    def backfill_metadata(self, page_size: int = 1000) -> int:
+        # Chunks written before partitioning have no session_id or created_at, so
+        # session filters and retention would never see them. Run once at startup;
+        # afterwards it only reads metadata.
+        backfill_ids, backfill_metadatas = [], []
+        offset = 0
+        while True:
+            page = self.vectorstore.get(include=["metadatas"], limit=page_size, offset=offset)
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                if "created_at" in metadata and "session_id" in metadata:
+                    continue
+                try:
+                    created_at = datetime.fromisoformat(metadata["timestamp"]).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    created_at = time.time()
+                backfill_ids.append(doc_id)
+                backfill_metadatas.append({
+                    **metadata,
+                    "created_at": created_at,
+                    "session_id": metadata.get("session_id", NO_SESSION)
+                })
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+        for start in range(0, len(backfill_ids), page_size):
+            self.vectorstore._collection.update(
+                ids=backfill_ids[start:start + page_size],
+                metadatas=backfill_metadatas[start:start + page_size]
+            )
+        if backfill_ids:
+            logger.info(f"Backfilled session/created_at metadata on {len(backfill_ids)} chunk(s)")
+        return len(backfill_ids)
+
+    def _scan(self, page_size: int = 1000) -> Dict[str, List[Tuple[str, float]]]:
+        # (id, created_at) per session, paged so a large index is not loaded at once
+        sessions: Dict[str, List[Tuple[str, float]]] = {}
+        offset = 0
+        while True:
+            page = self.vectorstore.get(include=["metadatas"], limit=page_size, offset=offset)
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                sessions.setdefault(metadata.get("session_id", NO_SESSION), []).append(
+                    (doc_id, metadata.get("created_at", time.time()))
+                )
+            if len(page["ids"]) < page_size:
+                break
+            offset += page_size
+        return sessions
+
+    def _delete(self, ids: List[str], batch_size: int = 1000):
+        for start in range(0, len(ids), batch_size):
+            self.vectorstore.delete(ids=ids[start:start + batch_size])
+
+    def _near_duplicates(self, ids: List[str], similarity: float) -> List[str]:
+        # ids are newest first; a chunk is dropped when a newer kept chunk is at
+        # least `similarity` cosine-similar to it
+        page = self.vectorstore.get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(page["ids"], page["embeddings"]))
+        ordered = [doc_id for doc_id in ids if doc_id in by_id]
+        if len(ordered) < 2:
+            return []
+        vectors = np.asarray([by_id[doc_id] for doc_id in ordered], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        kept: List[int] = []
+        duplicates = []
+        for index in range(len(ordered)):
+            if kept and float(np.max(vectors[kept] @ vectors[index])) >= similarity:
+                duplicates.append(ordered[index])
+            else:
+                kept.append(index)
+        return duplicates
+
+    def compact(
+        self,
+        retention_seconds: float = 0,
+        max_chunks_per_session: int = 0,
+        duplicate_similarity: float = 0,
+        dedupe_window: int = 2000
+    ) -> Dict:
+        # Retention by age, a per-session cap, then near-duplicate removal among
+        # each partition's newest dedupe_window chunks, newest chunks winning.
+        # Zero disables each step. The shared sessionless partition is never
+        # capped, since every client that sends no session_id relies on it.
+        start = time.perf_counter()
+        sessions = self._scan()
+        cutoff = time.time() - retention_seconds if retention_seconds else None
+        expired, duplicates, over_cap = [], [], []
+        partitions = 0
+        for session_id, chunks in sessions.items():
+            chunks.sort(key=lambda chunk: chunk[1], reverse=True)
+            if cutoff is not None:
+                expired.extend(doc_id for doc_id, created_at in chunks if created_at < cutoff)
+                chunks = [chunk for chunk in chunks if chunk[1] >= cutoff]
+            ids = [doc_id for doc_id, _ in chunks]
+            if max_chunks_per_session and session_id != NO_SESSION and len(ids) > max_chunks_per_session:
+                over_cap.extend(ids[max_chunks_per_session:])
+                ids = ids[:max_chunks_per_session]
+            if duplicate_similarity and len(ids) > 1:
+                # The window keeps the pairwise check bounded on large partitions
+                duplicates.extend(self._near_duplicates(ids[:dedupe_window], duplicate_similarity))
+            partitions += bool(ids)
+        self._delete(expired + duplicates + over_cap)
+        self.partitions = partitions
+        return {
+            "expired": len(expired),
+            "duplicates": len(duplicates),
+            "over_cap": len(over_cap),
+            "seconds": round(time.perf_counter() - start, 3)
+        }
+
+    def disk_mb(self) -> float:
+        total = 0
+        for root, _, files in os.walk(self.persist_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return round(total / (1024 * 1024), 2)
+
+    def stats(self) -> Dict:
+        recent = sorted(self._query_ms)
+        return {
+            "chunks": self.vectorstore._collection.count(),
+            "partitions": self.partitions,
+            "disk_mb": self.disk_mb(),
+            "memory_scope": self.memory_scope,
+            "queries": self.queries,
+            "query_ms_p50": round(recent[len(recent) // 2], 2) if recent else None,
+            "query_ms_p95": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2) if recent else None
+        }
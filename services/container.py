@@ -0,0 +1,303 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from config.settings import Settings
+from utils.logging import setup_logging
+from utils.memory import rss_mb
+
+logger = setup_logging()
+
+# Loaded by warm-up, heaviest first so readiness is reached as early as possible
+WARMUP_ORDER = (
+    "disease_service",
+    "chroma_service",
+    "knowledge_base",
+    "conversation_writer",
+    "memory_compactor",
+    "llm_service",
+    "http_client",
+    "weather_service",
+    "audio_service"
+)
+WARMUP_MODES = ("eager", "background", "lazy")
+# Readiness only waits for these (their own dependencies load with them); any
+# other component that fails leaves the API serving in a degraded state
+REQUIRED_FOR_READY = ("disease_service", "llm_service", "weather_service")
+
+
+class ServiceContainer:
+    # Application-scoped registry: each service is built at most once, on
+    # first use or during warm-up. Heavy modules (TensorFlow, LangChain,
+    # pyttsx3) are imported inside the factories so importing the API does
+    # not load them.
+    def __init__(self, settings: Settings):
+        if settings.warmup_mode not in WARMUP_MODES:
+            raise ValueError(f"warmup_mode must be one of {', '.join(WARMUP_MODES)}")
+        self.settings = settings
+        self._instances: Dict[str, Any] = {}
+        self._locks = {name: threading.Lock() for name in WARMUP_ORDER}
+        self._factories: Dict[str, Callable[[], Any]] = {
+            "disease_service": self._build_disease_service,
+            "chroma_service": self._build_chroma_service,
+            "knowledge_base": self._build_knowledge_base,
+            "conversation_writer": self._build_conversation_writer,
+            "memory_compactor": self._build_memory_compactor,
+            "llm_service": self._build_llm_service,
+            "http_client": self._build_http_client,
+            "weather_service": self._build_weather_service,
+            "audio_service": self._build_audio_service
+        }
+        self.status: Dict[str, Dict] = {name: {"state": "pending"} for name in WARMUP_ORDER}
+        self.started_at = time.perf_counter()
+        self.startup_rss_mb = rss_mb()
+        self.warmup_seconds: Optional[float] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._maintenance_started = False
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                self.status[name] = {"state": "loading"}
+                try:
+                    instance = self._factories[name]()
+                except Exception as e:
+                    self.status[name] = {"state": "failed", "error": str(e)}
+                    raise
+                self._instances[name] = instance
+                self.status[name] = {
+                    "state": "ready",
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "rss_mb_after": rss_mb()
+                }
+                logger.info(f"Loaded {name} in {self.status[name]['load_seconds']}s")
+        return instance
+
+    async def aget(self, name: str) -> Any:
+        # Builds off the event loop the first time; afterwards a dict lookup
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        return await asyncio.to_thread(self.get, name)
+
+    def loaded(self, name: str) -> Optional[Any]:
+        return self._instances.get(name)
+
+    @property
+    def ready(self) -> bool:
+        if self.settings.warmup_mode == "lazy":
+            return True
+        return all(self.status[name]["state"] == "ready" for name in REQUIRED_FOR_READY)
+
+    @property
+    def degraded(self) -> List[str]:
+        return [
+            name for name in WARMUP_ORDER
+            if name not in REQUIRED_FOR_READY and self.status[name]["state"] == "failed"
+        ]
+
+    def _warm_up(self):
+        for name in WARMUP_ORDER:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"Warm-up failed for {name}: {str(e)}")
+        self.warmup_seconds = round(time.perf_counter() - self.started_at, 3)
+        logger.info(f"Warm-up finished in {self.warmup_seconds}s, RSS {rss_mb()} MB")
+
+    async def start(self):
+        mode = self.settings.warmup_mode
+        logger.info(f"Starting services (warm-up: {mode}), RSS {self.startup_rss_mb} MB")
+        if mode == "eager":
+            await asyncio.to_thread(self._warm_up)
+            await self.start_maintenance()
+        elif mode == "background":
+            self._warmup_task = asyncio.create_task(self._background_warm_up())
+
+    async def _background_warm_up(self):
+        await asyncio.to_thread(self._warm_up)
+        await self.start_maintenance()
+
+    async def start_maintenance(self):
+        if self._maintenance_started:
+            return
+        self._maintenance_started = True
+        try:
+            compactor = await self.aget("memory_compactor")
+            await compactor.start()
+        except Exception as e:
+            logger.error(f"Could not start memory compaction: {str(e)}")
+
+    async def shutdown(self):
+        if self._warmup_task is not None and not self._warmup_task.done():
+            # A factory cannot be interrupted mid-load; let it finish first
+            await asyncio.shield(self._warmup_task)
+        compactor = self.loaded("memory_compactor")
+        if compactor is not None:
+            await compactor.stop()
+        writer = self.loaded("conversation_writer")
+        if writer is not None:
+            await writer.stop()
+        disease_service = self.loaded("disease_service")
+        if disease_service is not None:
+            await asyncio.to_thread(disease_service.close)
+        http_client = self.loaded("http_client")
+        if http_client is not None:
+            await http_client.aclose()
+        audio_service = self.loaded("audio_service")
+        if audio_service is not None:
+            await asyncio.to_thread(audio_service.close)
+
+    def report(self) -> Dict:
+        degraded = self.degraded
+        if self.ready:
+            status = "degraded" if degraded else "ready"
+        elif any(self.status[name]["state"] == "failed" for name in REQUIRED_FOR_READY):
+            status = "failed"
+        else:
+            status = "starting"
+        return {
+            "ready": status in ("ready", "degraded"),
+            "status": status,
+            "degraded": degraded,
+            "warmup_mode": self.settings.warmup_mode,
+            "warmup_seconds": self.warmup_seconds,
+            "startup_rss_mb": self.startup_rss_mb,
+            "rss_mb": rss_mb(),
+            "components": self.status
+        }
+
+    def collect_metrics(self) -> List[str]:
+        # Scrape-time gauges from the stats() of whichever components are loaded
+        sources = []
+        disease_service = self.loaded("disease_service")
+        if disease_service is not None and disease_service.cache is not None:
+            sources.append(("prediction_cache", disease_service.cache.stats))
+        chroma_service = self.loaded("chroma_service")
+        if chroma_service is not None:
+            sources.append(("conversation_memory", chroma_service.stats))
+            if hasattr(chroma_service.embeddings, "stats"):
+                sources.append(("embedding_cache", chroma_service.embeddings.stats))
+        compactor = self.loaded("memory_compactor")
+        if compactor is not None:
+            sources.append(("memory_compactor", compactor.stats))
+        llm_service = self.loaded("llm_service")
+        if llm_service is not None:
+            if llm_service.response_cache is not None:
+                sources.append(("response_cache", llm_service.response_cache.stats))
+            sources.append(("prompt_budget", llm_service.prompt_budget.stats))
+        http_client = self.loaded("http_client")
+        if http_client is not None:
+            sources.append(("http_client", http_client.stats))
+
+        lines = [
+            "# HELP agri_component_stat Counters and sizes reported by caches and clients",
+            "# TYPE agri_component_stat gauge"
+        ]
+        for component, stats in sources:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'agri_component_stat{{component="{component}",stat="{key}"}} {value}')
+        lines.append("# HELP agri_component_ready Whether each service has finished loading")
+        lines.append("# TYPE agri_component_ready gauge")
+        for name, status in self.status.items():
+            lines.append(f'agri_component_ready{{component="{name}"}} {int(status["state"] == "ready")}')
+        return lines
+
+    # Factories
+
+    def _build_disease_service(self):
+        from services.disease_service import DiseaseService
+        return DiseaseService(self.settings)
+
+    def _build_chroma_service(self):
+        from services.chroma_service import ChromaService
+        chroma_service = ChromaService(self.settings)
+        # Before any retrieval, so session filters see chunks stored without metadata
+        chroma_service.backfill_metadata()
+        return chroma_service
+
+    def _build_knowledge_base(self):
+        from services.disease_knowledge import DiseaseKnowledgeBase
+        vectorstore = None
+        if self.settings.disease_knowledge_search:
+            vectorstore = self.get("chroma_service").open_collection(self.settings.disease_knowledge_collection)
+        return DiseaseKnowledgeBase(self.settings.disease_knowledge_index, vectorstore=vectorstore)
+
+    def _build_conversation_writer(self):
+        from services.conversation_writer import ConversationWriter
+        return ConversationWriter(
+            self.get("chroma_service"),
+            max_pending=self.settings.conversation_queue_max_pending,
+            flush_size=self.settings.conversation_flush_size,
+            flush_interval=self.settings.conversation_flush_interval
+        )
+
+    def _build_memory_compactor(self):
+        from services.memory_compactor import MemoryCompactor
+        return MemoryCompactor(
+            self.get("chroma_service"),
+            interval_seconds=self.settings.memory_compaction_interval_seconds,
+            retention_days=self.settings.memory_retention_days,
+            max_chunks_per_session=self.settings.memory_max_chunks_per_session,
+            duplicate_similarity=self.settings.memory_duplicate_similarity,
+            history_size=self.settings.memory_stats_history
+        )
+
+    def _build_llm_service(self):
+        from services.llm_service import LLMService
+        from services.prompt_budget import PromptBudget
+        response_cache = None
+        if self.settings.response_cache_enabled:
+            from services.response_cache import ResponseCache
+            response_cache = ResponseCache(
+                self.get("chroma_service").embeddings,
+                max_entries=self.settings.response_cache_max_entries,
+                ttl_seconds=self.settings.response_cache_ttl_seconds,
+                similarity_threshold=self.settings.response_cache_similarity,
+                bypass_with_history=self.settings.response_cache_bypass_with_history,
+                # Session-scoped memory makes answers session-specific
+                per_session=self.settings.memory_scope == "session"
+            )
+        return LLMService(
+            self.settings.llm_model,
+            self.get("chroma_service"),
+            self.settings.ollama_base_url,
+            retrieval_timeout=self.settings.context_retrieval_timeout,
+            weather_timeout=self.settings.context_weather_timeout,
+            conversation_writer=self.get("conversation_writer"),
+            knowledge_base=self.get("knowledge_base"),
+            response_cache=response_cache,
+            prompt_budget=PromptBudget(
+                max_tokens=self.settings.prompt_budget_tokens,
+                chars_per_token=self.settings.prompt_chars_per_token,
+                dedupe_similarity=self.settings.prompt_dedupe_similarity
+            )
+        )
+
+    def _build_http_client(self):
+        from services.http_client import AsyncHttpClient
+        return AsyncHttpClient(
+            timeout=self.settings.weather_request_timeout,
+            max_connections=self.settings.http_max_connections,
+            max_keepalive_connections=self.settings.http_max_keepalive_connections,
+            retries=self.settings.http_retries,
+            backoff_base=self.settings.http_backoff_base_seconds,
+            backoff_max=self.settings.http_backoff_max_seconds,
+            failure_threshold=self.settings.http_breaker_failure_threshold,
+            reset_timeout=self.settings.http_breaker_reset_seconds,
+            slow_call_seconds=self.settings.http_slow_call_seconds
+        )
+
+    def _build_weather_service(self):
+        from services.weather_service import WeatherService
+        return WeatherService(self.settings, http_client=self.get("http_client"))
+
+    def _build_audio_service(self):
+        from services.audio_service import AudioService
+        return AudioService(self.settings)
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from typing import List, Optional, Tuple
+from services.chroma_service import ChromaService
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+_STOP = object()
+
+
+class ConversationWriter:
+    # Write-behind queue for conversation persistence. Turns are buffered in a
+    # bounded asyncio.Queue (submit() waits when it is full) and flushed to
+    # Chroma in batches once flush_size turns are pending or flush_interval
+    # seconds have passed since the first one.
+    def __init__(
+        self,
+        chroma_service: ChromaService,
+        max_pending: int = 1000,
+        flush_size: int = 32,
+        flush_interval: float = 2.0
+    ):
+        self.chroma_service = chroma_service
+        self.max_pending = max_pending
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.flushed_turns = 0
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, user_input: str, response: str, session_id: Optional[str] = None):
+        if not self.running and not self._closed:
+            await self.start()
+        if not self.running:
+            # Already shut down: write through
+            await asyncio.to_thread(self.chroma_service.store_conversation, user_input, response, session_id)
+            return
+        await self._queue.put((user_input, response, session_id))
+
+    async def stop(self, timeout: float = 30.0):
+        # Drain everything still queued, then stop the worker
+        self._closed = True
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Conversation writer did not drain within {timeout}s; {self.pending} turn(s) dropped")
+            self._task.cancel()
+        self._task = None
+
+    async def _collect(self, first) -> Tuple[List[Tuple[str, str, Optional[str]]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch, stopping = await self._collect(item)
+            await self._flush(batch)
+            if stopping:
+                # Anything enqueued after the stop marker still gets written
+                rest = []
+                while not self._queue.empty():
+                    extra = self._queue.get_nowait()
+                    if extra is not _STOP:
+                        rest.append(extra)
+                if rest:
+                    await self._flush(rest)
+                return
+
+    async def _flush(self, batch: List[Tuple[str, str, Optional[str]]]):
+        start = time.perf_counter()
+        await asyncio.to_thread(self.chroma_service.store_conversations, batch)
+        self.flushes += 1
+        self.flushed_turns += len(batch)
+        logger.info(f"Flushed {len(batch)} conversation turn(s) in {(time.perf_counter() - start) * 1000:.1f}ms")
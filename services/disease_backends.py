@@ -0,0 +1,78 @@
+import numpy as np
+
+BACKENDS = ("keras", "tflite")
+
+
+class KerasBackend:
+    def __init__(self, model_path: str, num_threads: int = 0, max_batch_size: int = 1):
+        import tensorflow as tf
+        if num_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict_on_batch(batch))
+
+
+def _load_interpreter_class():
+    # Prefer the standalone runtimes, which avoid importing all of TensorFlow
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteBackend:
+    # Not thread-safe: each batcher thread or worker process needs its own instance
+    def __init__(self, model_path: str, num_threads: int = 0, max_batch_size: int = 1):
+        interpreter_class = _load_interpreter_class()
+        self.interpreter = interpreter_class(model_path=model_path, num_threads=num_threads or None)
+        self._input = self.interpreter.get_input_details()[0]
+        self._allocate(max(max_batch_size, 1))
+
+    def _allocate(self, batch_size: int):
+        # Tensors are sized once for the largest batch; smaller batches are
+        # padded up to it rather than reallocating on every size change
+        shape = [batch_size, *self._input["shape"][1:]]
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+        self._padded = np.zeros(shape, dtype=self._input["dtype"])
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        n = len(batch)
+        if n > self._batch_size:
+            self._allocate(n)
+        input_dtype = self._input["dtype"]
+        if input_dtype in (np.int8, np.uint8):
+            # Fully-quantized models take integer inputs
+            scale, zero_point = self._input["quantization"]
+            batch = np.clip(np.round(batch / scale + zero_point), np.iinfo(input_dtype).min, np.iinfo(input_dtype).max)
+        # Rows past n keep whatever an earlier batch left; their outputs are dropped
+        self._padded[:n] = batch
+        self.interpreter.set_tensor(self._input["index"], self._padded)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output["index"])[:n]
+        if self._output["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = self._output["quantization"]
+            return (output.astype(np.float32) - zero_point) * scale
+        return output.copy()
+
+
+def load_backend(kind: str, model_path: str, num_threads: int = 0, max_batch_size: int = 1):
+    if kind == "keras":
+        return KerasBackend(model_path, num_threads, max_batch_size)
+    if kind == "tflite":
+        return TFLiteBackend(model_path, num_threads, max_batch_size)
+    raise ValueError(f"Unknown disease model backend '{kind}'; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,105 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional
+from utils.logging import setup_logging
+from utils.metrics import timed
+
+logger = setup_logging()
+
+SECTIONS = ("symptoms", "causes", "treatment", "prevention")
+_SECTION_TITLES = {
+    "symptoms": "Symptoms",
+    "causes": "Causes",
+    "treatment": "Treatment Options",
+    "prevention": "Prevention Strategies"
+}
+
+
+def normalize_label(label: str) -> str:
+    # "Tomato___Late_blight", "tomato late blight" and "Tomato - Late Blight" share a key
+    return re.sub(r"[^a-z0-9]+", "", label.lower())
+
+
+def display_name(label: str) -> str:
+    crop, _, condition = label.partition("___")
+    return f"{crop.replace('_', ' ')} - {condition.replace('_', ' ').strip()}".strip(" -")
+
+
+def parse_sources(source_dir: str) -> Dict[str, Dict]:
+    # Source files are Markdown: "# <class label>", an optional summary
+    # paragraph, then "## <Section>" headings with "- " bullet items.
+    entries: Dict[str, Dict] = {}
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(".md"):
+            continue
+        entry = None
+        section = None
+        with open(os.path.join(source_dir, filename), encoding="utf-8") as f:
+            for raw in f:
+                line = raw.strip()
+                if line.startswith("# "):
+                    label = line[2:].strip()
+                    if label in entries:
+                        raise ValueError(f"Duplicate knowledge entry for {label} in {filename}")
+                    entry = {"label": label, "name": display_name(label), "summary": "", **{s: [] for s in SECTIONS}}
+                    entries[label] = entry
+                    section = None
+                elif line.startswith("## ") and entry is not None:
+                    section = line[3:].strip().lower()
+                    if section not in SECTIONS:
+                        raise ValueError(f"Unknown section '{line[3:]}' for {entry['label']} in {filename}")
+                elif line.startswith("- ") and entry is not None and section:
+                    entry[section].append(line[2:].strip())
+                elif line and entry is not None and section is None:
+                    entry["summary"] = f"{entry['summary']} {line}".strip()
+    return entries
+
+
+def build_index(source_dir: str, labels: List[str]) -> Dict:
+    entries = parse_sources(source_dir)
+    missing = [label for label in labels if label not in entries]
+    if missing:
+        raise ValueError(f"Knowledge sources are missing entries for: {', '.join(missing)}")
+    unknown = [label for label in entries if label not in labels]
+    if unknown:
+        raise ValueError(f"Knowledge sources contain unknown labels: {', '.join(unknown)}")
+    return {"version": 1, "entries": {label: entries[label] for label in labels}}
+
+
+def format_entry(entry: Dict) -> str:
+    lines = [f"{entry['name']}: {entry['summary']}".rstrip(": ")]
+    for section in SECTIONS:
+        if entry[section]:
+            lines.append(f"{_SECTION_TITLES[section]}:")
+            lines.extend(f"- {item}" for item in entry[section])
+    return "\n".join(lines)
+
+
+class DiseaseKnowledgeBase:
+    def __init__(self, index_path: str, vectorstore=None):
+        self.index_path = index_path
+        self.vectorstore = vectorstore
+        self.entries: Dict[str, Dict] = {}
+        self._contexts: Dict[str, str] = {}
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                self.entries = json.load(f)["entries"]
+            # Pre-render prompt sections so a lookup is a single dict access
+            self._contexts = {normalize_label(label): format_entry(entry) for label, entry in self.entries.items()}
+            logger.info(f"Loaded disease knowledge for {len(self.entries)} classes from {index_path}")
+        else:
+            logger.warning(f"Disease knowledge index not found at {index_path}; run scripts/build_disease_index.py")
+
+    def get_context(self, label: str) -> Optional[str]:
+        return self._contexts.get(normalize_label(label))
+
+    @timed("knowledge.search")
+    def search_documents(self, query: str, num_docs: int = 4) -> List[str]:
+        if self.vectorstore is None:
+            return []
+        try:
+            return [doc.page_content for doc in self.vectorstore.similarity_search(query, k=num_docs)]
+        except Exception as e:
+            logger.error(f"Error searching disease knowledge: {str(e)}")
+            return []
@@ -1,55 +1,150 @@
-import tensorflow as tf
-from PIL import Image
 import numpy as np
+import asyncio
 import os
+from typing import Dict, List, Tuple, Union
 from config.settings import Settings
+from services.batch_inference import BatchInferenceEngine
+from services.disease_backends import load_backend
+from services.disease_labels import CLASS_LABELS
+from services.image_preprocessor import ImagePreprocessor
+from services.inference_pool import ProcessInferencePool
+from services.prediction_cache import PredictionCache, content_key, perceptual_key
 from utils.logging import setup_logging
+from utils.metrics import timed
 
 logger = setup_logging()
 
 class DiseaseService:
     def __init__(self, settings: Settings):
-        self.model = tf.keras.models.load_model("trained_plant_disease_model.keras")
-        self.temp_dir = "temp"
-        if not os.path.exists(self.temp_dir):
-            os.makedirs(self.temp_dir)
-        self.class_labels = [
-            'Apple___Apple_scab', 'Apple___Black_rot', 'Apple___Cedar_apple_rust', 'Apple___healthy',
-            'Blueberry___healthy', 'Cherry_(including_sour)___Powdery_mildew',
-            'Cherry_(including_sour)___healthy', 'Corn_(maize)___Cercospora_leaf_spot Gray_leaf_spot',
-            'Corn_(maize)___Common_rust_', 'Corn_(maize)___Northern_Leaf_Blight', 'Corn_(maize)___healthy',
-            'Grape___Black_rot', 'Grape___Esca_(Black_Measles)', 'Grape___Leaf_blight_(Isariopsis_Leaf_Spot)',
-            'Grape___healthy', 'Orange___Haunglongbing_(Citrus_greening)', 'Peach___Bacterial_spot',
-            'Peach___healthy', 'Pepper,_bell___Bacterial_spot', 'Pepper,_bell___healthy',
-            'Potato___Early_blight', 'Potato___Late_blight', 'Potato___healthy',
-            'Raspberry___healthy', 'Soybean___healthy', 'Squash___Powdery_mildew',
-            'Strawberry___Leaf_scorch', 'Strawberry___healthy', 'Tomato___Bacterial_spot',
-            'Tomato___Early_blight', 'Tomato___Late_blight', 'Tomato___Leaf_Mold',
-            'Tomato___Septoria_leaf_spot', 'Tomato___Spider_mites Two-spotted_spider_mite',
-            'Tomato___Target_Spot', 'Tomato___Tomato_Yellow_Leaf_Curl_Virus', 'Tomato___Tomato_mosaic_virus',
-            'Tomato___healthy'
-        ]
+        self.preprocessor = ImagePreprocessor((128, 128))
+        self.class_labels = list(CLASS_LABELS)
+        self.backend = settings.disease_model_backend
+        self.model_path = (
+            settings.disease_tflite_model_path if self.backend == "tflite" else settings.disease_model_path
+        )
+        self.model = None
+        self.pool = None
+        if settings.disease_inference_processes > 0:
+            # Out-of-process inference: the API process never loads the model runtime
+            self.pool = ProcessInferencePool(
+                self.backend,
+                self.model_path,
+                num_workers=settings.disease_inference_processes,
+                max_batch_size=settings.disease_batch_max_size,
+                input_shape=self.preprocessor.input_shape,
+                num_classes=len(self.class_labels),
+                # Split the cores between workers unless configured explicitly
+                threads_per_worker=settings.disease_inference_threads_per_process
+                or max(1, (os.cpu_count() or 1) // settings.disease_inference_processes)
+            )
+            self.pool.start()
+            batch_fn = self._predict_batch_pool
+        else:
+            self.model = load_backend(
+                self.backend,
+                self.model_path,
+                settings.disease_inference_threads_per_process,
+                max_batch_size=settings.disease_batch_max_size
+            )
+            # Reused by the batcher thread for every batch instead of np.stack
+            self._batch_buffer = np.empty(
+                (settings.disease_batch_max_size, *self.preprocessor.input_shape), dtype=np.float32
+            )
+            batch_fn = self._predict_batch
+        self.batcher = BatchInferenceEngine(
+            batch_fn,
+            max_batch_size=settings.disease_batch_max_size,
+            max_wait_ms=settings.disease_batch_max_wait_ms,
+            name="disease",
+            num_workers=max(settings.disease_inference_processes, 1)
+        )
+        self.batcher.start()
+        self.cache_top_k = settings.disease_cache_top_k
+        self.cache_perceptual = settings.disease_cache_perceptual
+        self.cache = PredictionCache(
+            self.model_path,
+            max_entries=settings.disease_cache_max_entries,
+            max_bytes=settings.disease_cache_max_mb * 1024 * 1024,
+            ttl_seconds=settings.disease_cache_ttl_seconds
+        ) if settings.disease_cache_enabled else None
+
+    @timed("disease.model_predict")
+    def _predict_batch(self, inputs: List[np.ndarray]) -> np.ndarray:
+        # Runs on the batcher thread; one forward pass for the whole batch
+        batch = self._batch_buffer[:len(inputs)]
+        for i, pixels in enumerate(inputs):
+            self.preprocessor.normalize(pixels, out=batch[i])
+        return self.model.predict(batch)
+
+    @timed("disease.model_predict")
+    def _predict_batch_pool(self, inputs: List[np.ndarray]) -> np.ndarray:
+        # Normalize directly into the worker's shared-memory input block
+        with self.pool.slot() as slot:
+            for i, pixels in enumerate(inputs):
+                self.preprocessor.normalize(pixels, out=slot.inputs[i])
+            return slot.run(len(inputs))
 
-    def predict_image(self, image_path: str) -> str:
+    def close(self):
+        self.batcher.shutdown()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _top_k(self, predictions: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        indices = np.argsort(predictions)[::-1][:k]
+        return [(self.class_labels[i], float(predictions[i])) for i in indices]
+
+    @timed("disease.predict")
+    async def predict_top_k(self, file_content: bytes, k: int = 3) -> List[Tuple[str, float]]:
         try:
-            image = Image.open(image_path)
-            image = image.resize((128, 128))
-            input_arr = np.array(image) / 255.0
-            input_arr = np.expand_dims(input_arr, axis=0)
-            predictions = self.model.predict(input_arr)
-            predicted_index = np.argmax(predictions)
-            return self.class_labels[predicted_index]
+            if self.cache is None:
+                pixels = await asyncio.to_thread(self.preprocessor.decode, file_content)
+                return self._top_k(await self.batcher.predict(pixels), k)
+
+            key = content_key(file_content)
+            cached = self.cache.get(key, count_miss=not self.cache_perceptual)
+            if cached is not None:
+                return cached[:k]
+            pixels = await asyncio.to_thread(self.preprocessor.decode, file_content)
+            if self.cache_perceptual:
+                similar_key = perceptual_key(pixels)
+                cached = self.cache.get(similar_key)
+                if cached is not None:
+                    self.cache.put(key, cached)
+                    return cached[:k]
+            top = self._top_k(await self.batcher.predict(pixels), max(k, self.cache_top_k))
+            self.cache.put(key, top)
+            if self.cache_perceptual:
+                self.cache.put(similar_key, top)
+            return top[:k]
         except Exception as e:
             logger.error(f"Error predicting image: {str(e)}")
             raise
 
-    def process_uploaded_image(self, file_content: bytes, filename: str) -> str:
-        file_location = os.path.join(self.temp_dir, filename)
-        with open(file_location, "wb") as f:
-            f.write(file_content)
-        try:
-            result = self.predict_image(file_location)
-            return result
-        finally:
-            if os.path.exists(file_location):
-                os.remove(file_location)
\ No newline at end of file
+    @timed("disease.predict_many")
+    async def _predict_or_reject(self, content: Union[bytes, Exception], k: int) -> List[Tuple[str, float]]:
+        # Upload staging hands over an error instead of bytes for rejected images
+        if isinstance(content, Exception):
+            raise content
+        return await self.predict_top_k(content, k)
+
+    async def predict_many(self, images: List[Tuple[str, Union[bytes, Exception]]], k: int = 3) -> List[Dict]:
+        # Submitted together so the batcher packs them into full batches
+        results = await asyncio.gather(
+            *(self._predict_or_reject(content, k) for _, content in images),
+            return_exceptions=True
+        )
+        return [
+            {"filename": name, "error": str(result)} if isinstance(result, Exception) else {
+                "filename": name,
+                "predictions": [{"label": label, "confidence": round(score, 4)} for label, score in result]
+            }
+            for (name, _), result in zip(images, results)
+        ]
+
+    async def predict_bytes(self, file_content: bytes) -> str:
+        top = await self.predict_top_k(file_content, k=1)
+        return top[0][0]
+
+    async def process_uploaded_image(self, file_content: bytes, filename: str) -> str:
+        logger.info(f"Predicting disease for {filename} ({len(file_content)} bytes)")
+        return await self.predict_bytes(file_content)
\ No newline at end of file
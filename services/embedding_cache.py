@@ -0,0 +1,113 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from utils.metrics import timed
+# SQLite caps bound parameters per statement; stay well below it
+_LOOKUP_CHUNK = 500
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    # Persistent (model, text hash) -> float32 vector cache in front of an
+    # embedding model. Cache misses are sent to the model in one batch.
+    def __init__(self, underlying: Embeddings, model_name: str, db_path: str, memory_entries: int = 4096):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.model_calls = 0
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        missing = []
+        for key in keys:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                found[key] = vector
+                self.memory_hits += 1
+            else:
+                missing.append(key)
+        for i in range(0, len(missing), _LOOKUP_CHUNK):
+            chunk = missing[i:i + _LOOKUP_CHUNK]
+            rows = self._db.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                (self.model_name, *chunk)
+            ).fetchall()
+            for key, blob in rows:
+                vector = np.frombuffer(blob, dtype=np.float32).tolist()
+                found[key] = vector
+                self._remember(key, vector)
+                self.disk_hits += 1
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+            [(self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()]
+        )
+        self._db.commit()
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+
+    @timed("embeddings.embed_documents")
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [_text_hash(text) for text in texts]
+        with self._lock:
+            found = self._lookup(list(dict.fromkeys(keys)))
+        pending = {key: text for key, text in zip(keys, texts) if key not in found}
+        if pending:
+            vectors = self.underlying.embed_documents(list(pending.values()))
+            computed = dict(zip(pending.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+                self.misses += len(pending)
+                self.model_calls += 1
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    @timed("embeddings.embed_query")
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "model": self.model_name,
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "model_calls": self.model_calls,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter, defaultdict
+from typing import IO, AsyncIterator, Dict, List, Optional, Tuple, Union
+from fastapi import UploadFile
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def _is_zip(upload: UploadFile) -> bool:
+    return (upload.filename or "").lower().endswith(".zip") or upload.content_type in (
+        "application/zip", "application/x-zip-compressed"
+    )
+
+
+# Same spill threshold as Starlette's uploads; a survey of hundreds of photos
+# sits on disk rather than in RAM until the stream has read it
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+def _copy_upload(source: IO[bytes]) -> IO[bytes]:
+    staged = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    source.seek(0)
+    shutil.copyfileobj(source, staged)
+    staged.seek(0)
+    return staged
+
+
+async def stage_uploads(files: List[UploadFile]) -> List[Tuple[str, bool, IO[bytes]]]:
+    # The framework closes request files once the endpoint returns, before a
+    # streamed body is consumed, so the stream works from its own copies
+    staged = []
+    for upload in files:
+        staged.append((upload.filename, _is_zip(upload), await asyncio.to_thread(_copy_upload, upload.file)))
+    return staged
+
+
+def _member_error(info: zipfile.ZipInfo, max_image_bytes: int, max_compression_ratio: float) -> Optional[ValueError]:
+    # Checked from the central directory before anything is decompressed.
+    # zipfile stops reading a member at its declared file_size, so a lying
+    # header cannot make read() return more than was checked here.
+    if info.file_size > max_image_bytes:
+        return ValueError(f"Image too large ({info.file_size} bytes, limit {max_image_bytes})")
+    if info.compress_size and info.file_size / info.compress_size > max_compression_ratio:
+        return ValueError(f"Suspicious compression ratio ({info.file_size / info.compress_size:.0f}:1)")
+    return None
+
+
+def _size(fileobj: IO[bytes]) -> int:
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+async def iter_uploaded_images(
+    staged: List[Tuple[str, bool, IO[bytes]]],
+    max_images: int,
+    max_image_bytes: int = 20 * 1024 * 1024,
+    max_compression_ratio: float = 100.0
+) -> AsyncIterator[Tuple[str, Union[bytes, Exception]]]:
+    # Yields (name, bytes) one image at a time; zip archives are read member
+    # by member so a large survey is never fully held in memory. Oversized
+    # images and zip-bomb-like members are yielded as (name, error) instead,
+    # so they fail on their own without ending the survey.
+    count = 0
+    for filename, is_zip, fileobj in staged:
+        if is_zip:
+            archive = await asyncio.to_thread(zipfile.ZipFile, fileobj)
+            try:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    if os.path.basename(info.filename).startswith("."):
+                        continue  # macOS resource forks and hidden files
+                    count += 1
+                    if count > max_images:
+                        raise ValueError(f"Too many images (limit {max_images})")
+                    name = f"{filename}/{info.filename}"
+                    error = _member_error(info, max_image_bytes, max_compression_ratio)
+                    yield name, error if error is not None else await asyncio.to_thread(archive.read, info)
+            finally:
+                archive.close()
+        else:
+            count += 1
+            if count > max_images:
+                raise ValueError(f"Too many images (limit {max_images})")
+            size = await asyncio.to_thread(_size, fileobj)
+            if size > max_image_bytes:
+                yield filename, ValueError(f"Image too large ({size} bytes, limit {max_image_bytes})")
+            else:
+                yield filename, await asyncio.to_thread(fileobj.read)
+
+
+def close_staged(staged: List[Tuple[str, bool, IO[bytes]]]):
+    for _, _, fileobj in staged:
+        fileobj.close()
+
+
+async def iter_chunks(images: AsyncIterator[Tuple], size: int) -> AsyncIterator[List[Tuple]]:
+    chunk = []
+    async for image in images:
+        chunk.append(image)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class FieldSurveySummary:
+    # Aggregates per-image top-1 predictions into per-crop disease counts
+    def __init__(self):
+        self.images = 0
+        self.failed = 0
+        self._crops: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, results: List[Dict]):
+        for result in results:
+            self.images += 1
+            if "error" in result:
+                self.failed += 1
+                continue
+            crop, _, condition = result["predictions"][0]["label"].partition("___")
+            self._crops[crop][condition] += 1
+
+    def to_dict(self) -> Dict:
+        crops = {}
+        for crop, conditions in sorted(self._crops.items()):
+            total = sum(conditions.values())
+            healthy = conditions.get("healthy", 0)
+            crops[crop.replace("_", " ")] = {
+                "images": total,
+                "healthy": healthy,
+                "diseased_ratio": round((total - healthy) / total, 3) if total else 0.0,
+                "diseases": {
+                    condition.replace("_", " ").strip(): count
+                    for condition, count in conditions.most_common() if condition != "healthy"
+                }
+            }
+        return {"images": self.images, "failed": self.failed, "crops": crops}
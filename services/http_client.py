@@ -0,0 +1,200 @@
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import httpx
+from utils.logging import setup_logging
+from utils.metrics import timed
+from utils.single_flight import SingleFlight
+
+logger = setup_logging()
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class UpstreamError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after failure_threshold consecutive failures (a call slower
+    # than slow_call_seconds counts as a failure); open -> half-open after
+    # reset_timeout, where a single trial call decides whether to close again.
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, slow_call_seconds: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def abandon(self):
+        # A trial call that was cancelled says nothing about the upstream; let
+        # the next caller make the trial instead of staying half-open forever
+        if self.state == "half_open":
+            self._trial_in_flight = False
+
+    def record(self, success: bool, elapsed: float):
+        if success and elapsed <= self.slow_call_seconds:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_in_flight = False
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class AsyncHttpClient:
+    # Shared client for upstream HTTP APIs: one connection pool, coalescing of
+    # identical in-flight GETs, per-attempt timeouts with jittered exponential
+    # backoff, and a circuit breaker per host.
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        slow_call_seconds: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        # transport lets tests or benchmarks route requests to a local fake server
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+            transport=transport
+        )
+        self._in_flight = SingleFlight()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.attempts = 0
+        self.retried = 0
+        self.failures = 0
+
+    @staticmethod
+    def _key(url: str, params: Optional[Dict]) -> Tuple:
+        return (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout, self.slow_call_seconds
+            )
+        return breaker
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from many clients from arriving in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _fetch(self, url: str, params: Optional[Dict], timeout: float) -> Any:
+        breaker = self.breaker(url)
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+            if attempt:
+                self.retried += 1
+            self.attempts += 1
+            start = time.monotonic()
+            try:
+                response = await self._client.get(url, params=params, timeout=timeout)
+                if response.status_code in _RETRY_STATUS:
+                    raise UpstreamError(f"{urlsplit(url).netloc} returned {response.status_code}")
+                response.raise_for_status()
+                payload = response.json()
+            except (httpx.TransportError, UpstreamError) as e:
+                # Timeouts, connection errors and retryable statuses
+                breaker.record(False, time.monotonic() - start)
+                last_error = e
+                if attempt < self.retries:
+                    await asyncio.sleep(self._backoff(attempt))
+                continue
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except (httpx.HTTPStatusError, json.JSONDecodeError) as e:
+                # Client errors and bad payloads will not succeed on retry
+                breaker.record(True, time.monotonic() - start)
+                raise UpstreamError(str(e))
+            except Exception as e:
+                breaker.record(False, time.monotonic() - start)
+                raise UpstreamError(str(e))
+            breaker.record(True, time.monotonic() - start)
+            return payload
+        raise UpstreamError(f"Request to {urlsplit(url).netloc} failed after {self.retries + 1} attempts: {str(last_error)}")
+
+    async def _fetch_counted(self, url: str, params: Optional[Dict], timeout: float) -> Any:
+        try:
+            return await self._fetch(url, params, timeout)
+        except (CircuitOpenError, UpstreamError):
+            self.failures += 1
+            raise
+
+    @timed("http.get_json")
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        timeout: Optional[float] = None
+    ) -> Any:
+        # Identical concurrent requests share one upstream call (single-flight)
+        self.requests += 1
+        key = self._key(url, params)
+        if key in self._in_flight:
+            self.coalesced += 1
+        return await self._in_flight.run(key, lambda: self._fetch_counted(url, params, timeout or self.timeout))
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "attempts": self.attempts,
+            "retried": self.retried,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight),
+            "breakers": {
+                host: {"state": breaker.state, "consecutive_failures": breaker.failures, "times_opened": breaker.times_opened}
+                for host, breaker in self._breakers.items()
+            }
+        }
+
+    async def aclose(self):
+        self._in_flight.cancel_all()
+        await self._client.aclose()
@@ -0,0 +1,37 @@
+import io
+from typing import Optional, Tuple
+import numpy as np
+from PIL import Image
+from utils.metrics import timed
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+class ImagePreprocessor:
+    def __init__(self, size: Tuple[int, int] = (128, 128)):
+        self.size = size
+
+    @property
+    def input_shape(self) -> Tuple[int, int, int]:
+        return (self.size[1], self.size[0], 3)
+
+    @timed("disease.decode")
+    def decode(self, content: bytes) -> np.ndarray:
+        # Decode straight from the upload bytes. For JPEGs, draft mode lets
+        # libjpeg scale by 1/2..1/8 during decode so large photos never
+        # materialize at full resolution. Returns uint8 HxWx3.
+        with Image.open(io.BytesIO(content)) as image:
+            image.draft("RGB", self.size)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            if image.size != self.size:
+                image = image.resize(self.size)
+            return np.asarray(image, dtype=np.uint8)
+
+    @staticmethod
+    def normalize(pixels: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        # float32 scaling into a caller-owned buffer when one is given
+        if out is None:
+            out = np.empty(pixels.shape, dtype=np.float32)
+        np.multiply(pixels, _SCALE, out=out, dtype=np.float32)
+        return out
@@ -0,0 +1,182 @@
+import multiprocessing as mp
+import queue
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Iterator, List, Tuple
+import numpy as np
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+def _worker_main(
+    backend: str,
+    model_path: str,
+    input_name: str,
+    output_name: str,
+    input_shape: Tuple[int, ...],
+    output_shape: Tuple[int, ...],
+    num_threads: int,
+    conn
+):
+    # Runs in a child process: owns one copy of the model and reads/writes
+    # batches through the two shared-memory blocks set up by the parent.
+    try:
+        from services.disease_backends import load_backend
+        model = load_backend(backend, model_path, num_threads, max_batch_size=input_shape[0])
+        shm_in = shared_memory.SharedMemory(name=input_name)
+        shm_out = shared_memory.SharedMemory(name=output_name)
+        inputs = np.ndarray(input_shape, dtype=np.float32, buffer=shm_in.buf)
+        outputs = np.ndarray(output_shape, dtype=np.float32, buffer=shm_out.buf)
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    conn.send(("ready", None))
+    try:
+        while True:
+            n = conn.recv()
+            if n is None:
+                break
+            try:
+                outputs[:n] = model.predict(inputs[:n])
+                conn.send(("ok", n))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    finally:
+        del inputs, outputs
+        shm_in.close()
+        shm_out.close()
+
+
+class _WorkerSlot:
+    def __init__(self, index: int, ctx, backend: str, model_path: str, max_batch_size: int,
+                 input_shape: Tuple[int, ...], num_classes: int, num_threads: int, start_timeout: float = 300.0):
+        self.index = index
+        self.start_timeout = start_timeout
+        self.restarts = 0
+        in_shape = (max_batch_size, *input_shape)
+        out_shape = (max_batch_size, num_classes)
+        self._shm_in = shared_memory.SharedMemory(create=True, size=int(np.prod(in_shape)) * 4)
+        self._shm_out = shared_memory.SharedMemory(create=True, size=int(np.prod(out_shape)) * 4)
+        # The API process writes preprocessed tensors straight into shared memory
+        self.inputs = np.ndarray(in_shape, dtype=np.float32, buffer=self._shm_in.buf)
+        self.outputs = np.ndarray(out_shape, dtype=np.float32, buffer=self._shm_out.buf)
+        self._ctx = ctx
+        self._args = (backend, model_path, self._shm_in.name, self._shm_out.name, in_shape, out_shape, num_threads)
+        self._spawn()
+
+    def _spawn(self):
+        self._conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(
+            target=_worker_main,
+            args=(*self._args, child_conn),
+            name=f"disease-inference-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self, timeout: float):
+        if not self._conn.poll(timeout):
+            raise RuntimeError(f"Inference worker {self.index} did not start within {timeout}s")
+        status, detail = self._conn.recv()
+        if status != "ready":
+            raise RuntimeError(f"Inference worker {self.index} failed to start: {detail}")
+
+    def _respawn(self):
+        # The shared-memory blocks belong to the slot, so a new process just reattaches
+        self.restarts += 1
+        logger.error(f"Inference worker {self.index} died (exit code {self.process.exitcode}); restarting")
+        self._conn.close()
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(5.0)
+        self._spawn()
+        self.wait_ready(self.start_timeout)
+
+    def run(self, n: int) -> np.ndarray:
+        if not self.process.is_alive():
+            self._respawn()
+        try:
+            self._conn.send(n)
+            status, detail = self._conn.recv()
+        except (EOFError, OSError) as e:
+            # Crashed mid-batch: restore the worker for later batches, but fail this
+            # one rather than retry an input that may be what crashed it
+            self._respawn()
+            raise RuntimeError(f"Inference worker {self.index} crashed: {str(e) or type(e).__name__}")
+        if status != "ok":
+            raise RuntimeError(f"Inference worker {self.index} failed: {detail}")
+        return self.outputs[:n].copy()
+
+    def close(self, timeout: float = 5.0):
+        try:
+            if self.process.is_alive():
+                self._conn.send(None)
+                self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        finally:
+            self._conn.close()
+            del self.inputs, self.outputs
+            for shm in (self._shm_in, self._shm_out):
+                shm.close()
+                shm.unlink()
+
+
+class ProcessInferencePool:
+    # N worker processes, each holding its own copy of the model, so
+    # prediction scales across cores without competing with the API for the GIL.
+    def __init__(
+        self,
+        backend: str,
+        model_path: str,
+        num_workers: int,
+        max_batch_size: int,
+        input_shape: Tuple[int, ...],
+        num_classes: int,
+        threads_per_worker: int = 1,
+        start_timeout: float = 300.0
+    ):
+        self.backend = backend
+        self.model_path = model_path
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.input_shape = input_shape
+        self.num_classes = num_classes
+        self.threads_per_worker = threads_per_worker
+        self.start_timeout = start_timeout
+        self._slots: List[_WorkerSlot] = []
+        self._idle: "queue.Queue[_WorkerSlot]" = queue.Queue()
+
+    def start(self):
+        ctx = mp.get_context("spawn")
+        try:
+            for index in range(self.num_workers):
+                self._slots.append(_WorkerSlot(
+                    index, ctx, self.backend, self.model_path, self.max_batch_size,
+                    self.input_shape, self.num_classes, self.threads_per_worker, self.start_timeout
+                ))
+            for slot in self._slots:
+                slot.wait_ready(self.start_timeout)
+                self._idle.put(slot)
+        except Exception:
+            self.shutdown()
+            raise
+        logger.info(f"Started {self.num_workers} disease inference worker process(es)")
+
+    @contextmanager
+    def slot(self) -> Iterator[_WorkerSlot]:
+        slot = self._idle.get()
+        try:
+            yield slot
+        finally:
+            self._idle.put(slot)
+
+    def shutdown(self):
+        for slot in self._slots:
+            try:
+                slot.close()
+            except Exception as e:
+                logger.error(f"Error stopping inference worker {slot.index}: {str(e)}")
+        self._slots = []
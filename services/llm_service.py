@@ -1,16 +1,44 @@
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Dict, Optional
 from langchain_ollama.llms import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
 from services.chroma_service import ChromaService
+from services.conversation_writer import ConversationWriter
+from services.disease_knowledge import DiseaseKnowledgeBase
+from services.prompt_budget import PromptBudget
+from services.response_cache import ResponseCache
 from services.weather_service import WeatherService
 from models.chat import ChatRequest, ChatResponse
 from utils.logging import setup_logging
+from utils.metrics import observe_stage, span, timed
 
 logger = setup_logging()
 
+_END_OF_STREAM = object()
+
 class LLMService:
-    def __init__(self, model_name: str, chroma_service: ChromaService):
-        self.model = OllamaLLM(model=model_name)
+    def __init__(
+        self,
+        model_name: str,
+        chroma_service: ChromaService,
+        base_url: Optional[str] = None,
+        retrieval_timeout: float = 3.0,
+        weather_timeout: float = 5.0,
+        conversation_writer: Optional[ConversationWriter] = None,
+        knowledge_base: Optional[DiseaseKnowledgeBase] = None,
+        response_cache: Optional[ResponseCache] = None,
+        prompt_budget: Optional[PromptBudget] = None
+    ):
+        self.model = OllamaLLM(model=model_name, base_url=base_url)
         self.chroma_service = chroma_service
+        self.retrieval_timeout = retrieval_timeout
+        self.weather_timeout = weather_timeout
+        self.conversation_writer = conversation_writer or ConversationWriter(chroma_service)
+        self.knowledge_base = knowledge_base
+        self.response_cache = response_cache
+        self.prompt_budget = prompt_budget or PromptBudget()
         self.prompt_template = """
 You are an expert in agriculture, specializing in detecting plant diseases, their causes, symptoms, treatments, and prevention strategies. 
 You also advise on the best plants to grow based on weather conditions (temperature, humidity) and provide reasoning for your recommendations to maximize benefits like yield and resilience.
@@ -37,45 +65,202 @@ User Question: {question}
 Assistant:
 """
         self.prompt = ChatPromptTemplate.from_template(self.prompt_template)
+        self._template_tokens = self.prompt_budget.estimate(self.prompt_template)
 
-    async def process_query(self, request: ChatRequest, weather_service: WeatherService) -> ChatResponse:
+    async def _gather_source(self, name: str, source: Awaitable[str], timeout: float, timings: Dict[str, float]) -> str:
+        # A slow or failing source degrades to an empty section instead of failing the request
+        start = time.perf_counter()
+        failed = False
         try:
-            # Get disease-specific context if available
-            context = ""
-            if request.detected_disease:
-                logger.info(f"Getting context for detected disease: {request.detected_disease}")
-                disease_info = self.chroma_service.retrieve_context(request.detected_disease)
-                context += f"Disease Information: {disease_info}\n\n"
-            
-            # Get context for the question
-            question_context = self.chroma_service.retrieve_context(request.question)
-            context += question_context
-            
-            # Get weather data if country is provided
-            weather_data = await weather_service.fetch_weather_summary(request.country) if request.country else ""
-
-            # Format conversation history
-            conversation_history = "\n".join(request.conversation_history) if request.conversation_history else ""
-            
-            # Format prompt input
-            formatted_input = self.prompt.format(
-                question=request.question,
-                conversation_history=conversation_history,
-                context=context,
-                weather_data=weather_data,
-                detected_disease=request.detected_disease or "No disease detected in the image"
+            return await asyncio.wait_for(source, timeout)
+        except asyncio.TimeoutError:
+            failed = True
+            logger.warning(f"Prompt source '{name}' timed out after {timeout}s")
+            return ""
+        except Exception as e:
+            failed = True
+            logger.error(f"Prompt source '{name}' failed: {str(e)}")
+            return ""
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[name] = elapsed * 1000
+            observe_stage(f"prompt.{name}", elapsed, failed)
+
+    async def _no_source(self) -> str:
+        return ""
+
+    async def _disease_context(self, detected_disease: str, session_id: Optional[str]) -> str:
+        # Known class labels resolve from the prebuilt knowledge index without
+        # touching Chroma; anything else falls back to similarity search.
+        if self.knowledge_base is not None:
+            knowledge = self.knowledge_base.get_context(detected_disease)
+            if knowledge:
+                return knowledge
+        return await asyncio.to_thread(self.chroma_service.retrieve_context, detected_disease, session_id=session_id)
+
+    @timed("llm.build_prompt")
+    async def build_prompt(self, request: ChatRequest, weather_service: WeatherService) -> str:
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        if request.detected_disease:
+            logger.info(f"Getting context for detected disease: {request.detected_disease}")
+
+        # Disease context, question context and weather are independent; fetch them concurrently
+        search_knowledge = self.knowledge_base is not None and self.knowledge_base.vectorstore is not None
+        disease_info, memory_chunks, reference_chunks, weather_data = await asyncio.gather(
+            self._gather_source(
+                "disease_context",
+                self._disease_context(request.detected_disease, request.session_id)
+                if request.detected_disease else self._no_source(),
+                self.retrieval_timeout,
+                timings
+            ),
+            self._gather_source(
+                "question_context",
+                asyncio.to_thread(self.chroma_service.retrieve_documents, request.question, session_id=request.session_id),
+                self.retrieval_timeout,
+                timings
+            ),
+            self._gather_source(
+                "knowledge_search",
+                asyncio.to_thread(self.knowledge_base.search_documents, request.question)
+                if search_knowledge else self._no_source(),
+                self.retrieval_timeout,
+                timings
+            ),
+            self._gather_source(
+                "weather",
+                weather_service.fetch_weather_summary(request.country)
+                if request.country else self._no_source(),
+                self.weather_timeout,
+                timings
             )
-            
+        )
+
+        # Keep the variable sections inside the token budget so prefill time stays
+        # flat as conversations grow
+        detected_disease = request.detected_disease or "No disease detected in the image"
+        fixed_tokens = self._template_tokens + self.prompt_budget.estimate(request.question + detected_disease)
+        fitted = self.prompt_budget.fit(
+            fixed_tokens,
+            disease_info,
+            weather_data,
+            reference_chunks or [],
+            memory_chunks or [],
+            request.conversation_history or []
+        )
+
+        context = ""
+        if request.detected_disease:
+            context += f"Disease Information: {fitted.disease_info}\n\n"
+        if fitted.reference:
+            context += "Reference Knowledge: " + "\n".join(fitted.reference) + "\n\n"
+        context += "\n".join(fitted.memory) if fitted.memory else "No context found"
+
+        # Format prompt input
+        prompt = self.prompt.format(
+            question=request.question,
+            conversation_history=fitted.history,
+            context=context,
+            weather_data=fitted.weather,
+            detected_disease=detected_disease
+        )
+        timings["total"] = (time.perf_counter() - start) * 1000
+        logger.info("Prompt stage timings (ms): " + ", ".join(f"{k}={v:.1f}" for k, v in timings.items()))
+        logger.info(
+            f"Prompt tokens (est.): total={fitted.report['total']}/{fitted.report['budget']}, "
+            + ", ".join(f"{k}={v}" for k, v in fitted.report["sections"].items())
+            + (f", history_kept={fitted.report['history_turns_kept']}, "
+               f"history_summarized={fitted.report['history_turns_summarized']}, "
+               f"chunks_deduplicated={fitted.report['chunks_deduplicated']}, "
+               f"chunks_dropped={fitted.report['chunks_dropped']}" if fitted.report["trimmed"] else "")
+        )
+        return prompt
+
+    async def _cached_response(self, request: ChatRequest):
+        if self.response_cache is None:
+            return None, None
+        try:
+            return await asyncio.to_thread(self.response_cache.lookup, request)
+        except Exception as e:
+            logger.error(f"Response cache lookup error: {str(e)}")
+            return None, None
+
+    @timed("llm.process_query")
+    async def process_query(self, request: ChatRequest, weather_service: WeatherService) -> ChatResponse:
+        try:
+            cached, cache_key = await self._cached_response(request)
+            if cached is not None:
+                logger.info(f"Response cache hit for detected_disease: {request.detected_disease}")
+                return ChatResponse(response=cached)
+            started = time.perf_counter()
+            formatted_input = await self.build_prompt(request, weather_service)
+
             # Log for debugging
             logger.info(f"Sending prompt with detected_disease: {request.detected_disease}")
-            
-            # Get response from LLM
-            response_text = self.model.invoke(formatted_input)
-            
-            # Store conversation
-            self.chroma_service.store_conversation(request.question, response_text)
-            
+
+            # Get response from LLM; the Ollama client blocks, keep it off the event loop
+            with span("llm.generate"):
+                response_text = await asyncio.to_thread(self.model.invoke, formatted_input)
+            if cache_key is not None:
+                self.response_cache.put(cache_key, response_text, time.perf_counter() - started)
+
+            # Store conversation (queued; written to Chroma in the background)
+            await self.conversation_writer.submit(request.question, response_text, request.session_id)
+
             return ChatResponse(response=response_text)
         except Exception as e:
             logger.error(f"LLM processing error: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    @timed("llm.stream_query")
+    async def stream_query(self, request: ChatRequest, weather_service: WeatherService) -> AsyncIterator[str]:
+        cached, cache_key = await self._cached_response(request)
+        if cached is not None:
+            yield cached
+            return
+        started = time.perf_counter()
+        formatted_input = await self.build_prompt(request, weather_service)
+        logger.info(f"Streaming prompt with detected_disease: {request.detected_disease}")
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            # Runs on a worker thread, handing tokens back to the loop as Ollama emits them
+            try:
+                for chunk in self.model.stream(formatted_input):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                loop.call_soon_threadsafe(chunks.put_nowait, _END_OF_STREAM)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+
+        producer = loop.run_in_executor(None, produce)
+        parts = []
+        completed = False
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is _END_OF_STREAM:
+                    completed = True
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"LLM streaming error: {str(e)}")
+            raise
+        finally:
+            # Stops the worker at the next token if the client went away
+            cancelled.set()
+
+        # Only persist answers that were generated completely
+        if completed:
+            await producer
+            if cache_key is not None:
+                self.response_cache.put(cache_key, "".join(parts), time.perf_counter() - started)
+            await self.conversation_writer.submit(request.question, "".join(parts), request.session_id)
\ No newline at end of file
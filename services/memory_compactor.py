@@ -0,0 +1,88 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from services.chroma_service import ChromaService
+from utils.logging import setup_logging
+
+logger = setup_logging()
+
+
+class MemoryCompactor:
+    # Periodic maintenance of the conversation memory collection: drops turns
+    # past the retention window, trims each session to its newest chunks and
+    # removes near-duplicates, then records index size and retrieval latency
+    # so growth of chroma_storage stays visible over time.
+    def __init__(
+        self,
+        chroma_service: ChromaService,
+        interval_seconds: float = 3600,
+        retention_days: float = 0,
+        max_chunks_per_session: int = 0,
+        duplicate_similarity: float = 0.95,
+        history_size: int = 48
+    ):
+        self.chroma_service = chroma_service
+        self.interval_seconds = interval_seconds
+        self.retention_days = retention_days
+        self.max_chunks_per_session = max_chunks_per_session
+        self.duplicate_similarity = duplicate_similarity
+        self.history = deque(maxlen=history_size)
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.runs = 0
+        self.removed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Memory compaction failed: {str(e)}")
+
+    async def run_once(self) -> Dict:
+        # A compaction already in progress is not started twice
+        async with self._lock:
+            result = await asyncio.to_thread(
+                self.chroma_service.compact,
+                self.retention_days * 86400,
+                self.max_chunks_per_session,
+                self.duplicate_similarity
+            )
+            stats = await asyncio.to_thread(self.chroma_service.stats)
+            snapshot = {"time": time.time(), **result, **stats}
+            self.history.append(snapshot)
+            self.runs += 1
+            self.removed += result["expired"] + result["duplicates"] + result["over_cap"]
+            logger.info(
+                f"Memory compaction removed {result['expired']} expired, {result['duplicates']} duplicate and "
+                f"{result['over_cap']} over-cap chunk(s) in {result['seconds']}s; "
+                f"{stats['chunks']} chunk(s) in {stats['partitions']} session(s), {stats['disk_mb']} MB"
+            )
+            return snapshot
+
+    def stats(self) -> Dict:
+        return {"runs": self.runs, "removed": self.removed, "running": self.running}
+
+    def report(self) -> List[Dict]:
+        return list(self.history)
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+TopK = List[Tuple[str, float]]
+
+
+def content_key(content: bytes) -> str:
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+def perceptual_key(pixels: np.ndarray, hash_size: int = 8) -> str:
+    # Average hash of the resized tensor: mean-pool the grayscale image down to
+    # hash_size x hash_size and set one bit per cell above the overall mean.
+    gray = pixels.mean(axis=2, dtype=np.float32)
+    h, w = gray.shape
+    cells = gray[: h - h % hash_size, : w - w % hash_size].reshape(
+        hash_size, h // hash_size, hash_size, w // hash_size
+    ).mean(axis=(1, 3))
+    bits = np.packbits((cells > cells.mean()).ravel())
+    return "ahash:" + bits.tobytes().hex()
+
+
+def _estimate_size(key: str, value: TopK) -> int:
+    # Rough per-entry footprint: key, list, tuples, label strings and floats
+    return 200 + len(key) + sum(120 + len(label) for label, _ in value)
+
+
+class PredictionCache:
+    def __init__(
+        self,
+        model_path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 24 * 3600,
+        model_check_interval: float = 5.0
+    ):
+        self.model_path = model_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.model_check_interval = model_check_interval
+        self._entries: "OrderedDict[str, Tuple[float, TopK, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._model_signature = self._read_model_signature()
+        self._next_model_check = time.monotonic() + model_check_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _read_model_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.model_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _check_model(self, now: float):
+        if now < self._next_model_check:
+            return
+        self._next_model_check = now + self.model_check_interval
+        signature = self._read_model_signature()
+        if signature != self._model_signature:
+            self._model_signature = signature
+            self._entries.clear()
+            self._bytes = 0
+            self.invalidations += 1
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[TopK]:
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                del self._entries[key]
+                self._bytes -= entry[2]
+                entry = None
+            if entry is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            value = entry[1]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: TopK):
+        now = time.monotonic()
+        size = _estimate_size(key, value)
+        with self._lock:
+            self._check_model(now)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (now + self.ttl_seconds, value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
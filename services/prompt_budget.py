@@ -0,0 +1,241 @@
+import json
+import math
+import re
+import threading
+from typing import Dict, List, NamedTuple, Set, Tuple
+from utils.metrics import timed
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# Weather summary parts dropped first when it is over budget: overall_mean repeats
+# the top-level averages, and the recent rolling windows matter most for advice
+WEATHER_DROP_ORDER = (
+    ("climate", "overall_mean"),
+    ("climate", "monthly_mean"),
+    ("climate", "seasonal_mean"),
+    ("climate", "period"),
+    ("climate", "rolling")
+)
+
+
+class FittedPrompt(NamedTuple):
+    disease_info: str
+    weather: str
+    reference: List[str]
+    memory: List[str]
+    history: str
+    report: Dict
+
+
+def _shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class PromptBudget:
+    # Keeps the variable parts of the prompt inside a token budget. Sections are
+    # filled in priority order (disease info, weather, retrieved chunks, history),
+    # each capped at a share of the budget; history takes whatever is left,
+    # newest turns first, and older turns are condensed into a short summary.
+    def __init__(
+        self,
+        max_tokens: int = 1536,
+        chars_per_token: float = 4.0,
+        dedupe_similarity: float = 0.8,
+        disease_share: float = 0.35,
+        weather_share: float = 0.15,
+        retrieval_share: float = 0.3,
+        summary_share: float = 0.1
+    ):
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.dedupe_similarity = dedupe_similarity
+        self.disease_share = disease_share
+        self.weather_share = weather_share
+        self.retrieval_share = retrieval_share
+        self.summary_share = summary_share
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed = 0
+        self.max_total = 0
+        self._section_totals: Dict[str, int] = {}
+
+    def estimate(self, text: str) -> int:
+        # Character heuristic (~4 chars per token for English with Llama-family
+        # tokenizers); cheap enough to run on every section of every request
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def truncate(self, text: str, tokens: int) -> str:
+        if self.estimate(text) <= tokens:
+            return text
+        limit = int(tokens * self.chars_per_token)
+        if limit <= 0:
+            return ""
+        # Prefer cutting at a line, then a word boundary
+        cut = text.rfind("\n", 0, limit)
+        if cut < limit // 2:
+            cut = text.rfind(" ", 0, limit)
+        if cut < limit // 2:
+            cut = limit
+        return text[:cut].rstrip() + " ..."
+
+    def fit_json(self, text: str, tokens: int, drop_order=WEATHER_DROP_ORDER) -> str:
+        # Cutting JSON by characters leaves it malformed and loses whatever comes
+        # last; instead drop whole keys in drop_order until it fits
+        if self.estimate(text) <= tokens:
+            return text
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return self.truncate(text, tokens)
+        if not isinstance(data, dict):
+            return self.truncate(text, tokens)
+        compact = json.dumps(data, separators=(",", ":"))
+        for path in drop_order:
+            if self.estimate(compact) <= tokens:
+                return compact
+            parent = data
+            for key in path[:-1]:
+                parent = parent.get(key) if isinstance(parent, dict) else None
+            if isinstance(parent, dict) and path[-1] in parent:
+                del parent[path[-1]]
+                compact = json.dumps(data, separators=(",", ":"))
+        return compact if self.estimate(compact) <= tokens else ""
+
+    def dedupe(self, chunks: List[str], seen_texts: List[str]) -> Tuple[List[str], int]:
+        # Drops exact and near-duplicate chunks (word 3-gram overlap coefficient, so a
+        # chunk contained in a longer one counts), including chunks that repeat
+        # text already placed in another section
+        seen = [_shingles(text) for text in seen_texts if text]
+        kept, removed = [], 0
+        for chunk in chunks:
+            shingles = _shingles(chunk)
+            if not shingles:
+                removed += 1
+                continue
+            duplicate = False
+            for other in seen:
+                overlap = len(shingles & other)
+                if overlap and overlap / min(len(shingles), len(other)) >= self.dedupe_similarity:
+                    duplicate = True
+                    break
+            if duplicate:
+                removed += 1
+                continue
+            seen.append(shingles)
+            kept.append(chunk)
+        return kept, removed
+
+    def _summarize(self, turns: List[str], tokens: int) -> str:
+        # Extractive: the first sentence of each dropped turn, most recent kept
+        # when space runs out
+        if tokens <= 0 or not turns:
+            return ""
+        header = "Earlier conversation (summarized):"
+        lines: List[str] = []
+        used = self.estimate(header)
+        for turn in reversed(turns):
+            first = _SENTENCE_BREAK.split(turn.strip(), maxsplit=1)[0]
+            line = "- " + self.truncate(first, 40)
+            cost = self.estimate(line) + 1
+            if used + cost > tokens:
+                break
+            lines.insert(0, line)
+            used += cost
+        return "\n".join([header, *lines]) if lines else ""
+
+    @timed("prompt.fit")
+    def fit(
+        self,
+        fixed_tokens: int,
+        disease_info: str,
+        weather: str,
+        reference: List[str],
+        memory: List[str],
+        history: List[str]
+    ) -> FittedPrompt:
+        # fixed_tokens covers the template, the question and anything else that is never cut
+        budget = max(self.max_tokens - fixed_tokens, 0)
+        requested = {
+            "disease_info": self.estimate(disease_info),
+            "weather": self.estimate(weather),
+            "retrieved": sum(self.estimate(chunk) for chunk in reference + memory),
+            "history": sum(self.estimate(turn) + 1 for turn in history)
+        }
+
+        trimmed_disease = self.truncate(disease_info, int(budget * self.disease_share))
+        remaining = budget - self.estimate(trimmed_disease)
+        trimmed_weather = self.fit_json(weather, min(int(budget * self.weather_share), remaining))
+        remaining -= self.estimate(trimmed_weather)
+        trimmed = trimmed_disease != disease_info or trimmed_weather != weather
+        disease_info, weather = trimmed_disease, trimmed_weather
+
+        reference, reference_removed = self.dedupe(reference, [disease_info])
+        memory, memory_removed = self.dedupe(memory, [disease_info, *reference])
+        retrieval_budget = min(int(budget * self.retrieval_share), remaining)
+        kept_reference, kept_memory, used = [], [], 0
+        for chunk, target in [(c, kept_reference) for c in reference] + [(c, kept_memory) for c in memory]:
+            cost = self.estimate(chunk) + 1
+            if used + cost > retrieval_budget:
+                continue
+            target.append(chunk)
+            used += cost
+        remaining -= used
+
+        # Room for the summary is only set aside when some turns will not fit
+        summary_budget = 0 if requested["history"] <= remaining else min(int(budget * self.summary_share), remaining)
+        kept_turns: List[str] = []
+        used = 0
+        for turn in reversed(history):
+            cost = self.estimate(turn) + 1
+            if used + cost > remaining - summary_budget:
+                break
+            kept_turns.insert(0, turn)
+            used += cost
+        dropped = history[:len(history) - len(kept_turns)]
+        summary = self._summarize(dropped, remaining - used)
+        history_text = "\n".join([summary, *kept_turns] if summary else kept_turns)
+
+        sections = {
+            "fixed": fixed_tokens,
+            "disease_info": self.estimate(disease_info),
+            "weather": self.estimate(weather),
+            "retrieved": sum(self.estimate(chunk) for chunk in kept_reference + kept_memory),
+            "history": self.estimate(history_text)
+        }
+        total = sum(sections.values())
+        chunks_dropped = len(reference) + len(memory) - len(kept_reference) - len(kept_memory)
+        trimmed = trimmed or bool(chunks_dropped or dropped)
+        report = {
+            "budget": self.max_tokens,
+            "total": total,
+            "sections": sections,
+            "requested": requested,
+            "history_turns_kept": len(kept_turns),
+            "history_turns_summarized": len(dropped),
+            "chunks_deduplicated": reference_removed + memory_removed,
+            "chunks_dropped": chunks_dropped,
+            "trimmed": trimmed
+        }
+        with self._lock:
+            self.prompts += 1
+            self.trimmed += int(trimmed)
+            self.max_total = max(self.max_total, total)
+            for name, tokens in sections.items():
+                self._section_totals[name] = self._section_totals.get(name, 0) + tokens
+        return FittedPrompt(disease_info, weather, kept_reference, kept_memory, history_text, report)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "budget": self.max_tokens,
+                "prompts": self.prompts,
+                "trimmed": self.trimmed,
+                "max_total_tokens": self.max_total,
+                "avg_section_tokens": {
+                    name: round(total / self.prompts, 1) for name, total in self._section_totals.items()
+                } if self.prompts else {}
+            }
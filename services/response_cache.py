@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from models.chat import ChatRequest
+from utils.logging import setup_logging
+from utils.metrics import timed
+
+logger = setup_logging()
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+Partition = Tuple[str, str, str]
+
+
+def normalize_question(question: str) -> str:
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", question.lower())).strip()
+
+
+class CacheKey(NamedTuple):
+    partition: Partition
+    question: str
+    vector: Optional[np.ndarray]
+
+
+class _Entry(NamedTuple):
+    expires: float
+    response: str
+    vector: Optional[np.ndarray]
+    generation_seconds: float
+
+
+class ResponseCache:
+    # Answers keyed on (detected disease, country, session) and the normalized
+    # question. Within a partition, a new question whose embedding is close
+    # enough to a cached one reuses that answer. With per_session, answers are
+    # only reused within the session whose conversation memory shaped them.
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings],
+        max_entries: int = 2048,
+        ttl_seconds: float = 6 * 3600,
+        similarity_threshold: float = 0.95,
+        bypass_with_history: bool = True,
+        per_session: bool = False
+    ):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.bypass_with_history = bypass_with_history
+        self.per_session = per_session
+        self._entries: "OrderedDict[Tuple[Partition, str], _Entry]" = OrderedDict()
+        self._partitions: Dict[Partition, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self.lookup_seconds = 0.0
+
+    def _partition(self, request: ChatRequest) -> Partition:
+        session = (request.session_id or "") if self.per_session else ""
+        return ((request.detected_disease or "").strip().lower(), (request.country or "").strip().lower(), session)
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        if self.embeddings is None:
+            return None
+        try:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        except Exception as e:
+            # Exact matches still work without the embedding service
+            logger.error(f"Error embedding question for response cache: {str(e)}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _remove(self, key: Tuple[Partition, str]):
+        self._entries.pop(key, None)
+        members = self._partitions.get(key[0])
+        if members is not None:
+            members.pop(key[1], None)
+            if not members:
+                del self._partitions[key[0]]
+
+    def _semantic_match(self, partition: Partition, vector: np.ndarray, now: float) -> Optional[Tuple[Partition, str]]:
+        candidates: List[Tuple[Partition, str]] = []
+        vectors = []
+        for question in self._partitions.get(partition, ()):
+            entry = self._entries[(partition, question)]
+            if entry.vector is not None and entry.expires >= now:
+                candidates.append((partition, question))
+                vectors.append(entry.vector)
+        if not candidates:
+            return None
+        scores = np.stack(vectors) @ vector
+        best = int(scores.argmax())
+        return candidates[best] if scores[best] >= self.similarity_threshold else None
+
+    @timed("response_cache.lookup")
+    def lookup(self, request: ChatRequest) -> Tuple[Optional[str], Optional[CacheKey]]:
+        # Blocking (may call the embedding model); returns (cached answer, key to
+        # store the fresh answer under). A None key means the cache was bypassed.
+        if self.bypass_with_history and request.conversation_history:
+            with self._lock:
+                self.bypassed += 1
+            return None, None
+        start = time.perf_counter()
+        partition = self._partition(request)
+        question = normalize_question(request.question)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((partition, question))
+        vector = None
+        if entry is None or entry.expires < now:
+            vector = self._embed(question)
+        with self._lock:
+            match = (partition, question) if entry is not None and entry.expires >= now else None
+            exact = match is not None
+            if match is None and vector is not None:
+                match = self._semantic_match(partition, vector, now)
+            self.lookup_seconds += time.perf_counter() - start
+            if match is None:
+                self.misses += 1
+                return None, CacheKey(partition, question, vector)
+            entry = self._entries[match]
+            self._entries.move_to_end(match)
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+            self.saved_seconds += entry.generation_seconds
+            return entry.response, None
+
+    def put(self, key: CacheKey, response: str, generation_seconds: float):
+        now = time.monotonic()
+        with self._lock:
+            entry_key = (key.partition, key.question)
+            self._remove(entry_key)
+            self._entries[entry_key] = _Entry(now + self.ttl_seconds, response, key.vector, generation_seconds)
+            self._partitions.setdefault(key.partition, {})[key.question] = None
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._partitions.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "partitions": len(self._partitions),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "avg_saved_ms_per_hit": round(self.saved_seconds * 1000 / hits, 1) if hits else 0.0,
+                "avg_lookup_ms": round(self.lookup_seconds * 1000 / (lookups or 1), 2),
+                "similarity_threshold": self.similarity_threshold
+            }
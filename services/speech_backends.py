@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import speech_recognition as sr
+
+STT_BACKENDS = ("google", "sphinx", "vosk")
+TTS_BACKENDS = ("pyttsx3",)
+
+
+class GoogleSTT:
+    # Online: sends the audio to the Google Web Speech API
+    def __init__(self, language: str = "en-US"):
+        self.recognizer = sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            raise ValueError("Could not understand audio")
+        except sr.RequestError as e:
+            raise RuntimeError(f"Speech recognition error: {str(e)}")
+
+
+class SphinxSTT:
+    # Offline: CMU PocketSphinx through speech_recognition (pip install pocketsphinx)
+    def __init__(self, language: str = "en-US"):
+        import pocketsphinx  # noqa: F401  fail at startup rather than on the first request
+        self.recognizer = sr.Recognizer()
+        self.language = language
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        try:
+            return self.recognizer.recognize_sphinx(audio, language=self.language)
+        except sr.UnknownValueError:
+            raise ValueError("Could not understand audio")
+        except sr.RequestError as e:
+            raise RuntimeError(f"Speech recognition error: {str(e)}")
+
+
+class VoskSTT:
+    # Offline: Kaldi-based Vosk (pip install vosk, plus a model from alphacephei.com/vosk/models)
+    def __init__(self, model_path: str):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        # The model is read-only and shared; recognizers are cheap and created per request
+        self.model = Model(model_path)
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, 16000)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        if not text:
+            raise ValueError("Could not understand audio")
+        return text
+
+
+class Pyttsx3TTS:
+    # Offline: espeak / SAPI5 / NSSpeech. The engine is not thread-safe, so the
+    # caller must create and use it from a single thread.
+    media_type = "audio/wav"
+
+    def __init__(self, rate: int = 0):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        if rate:
+            self.engine.setProperty("rate", rate)
+
+    def synthesize(self, text: str) -> bytes:
+        # pyttsx3 can only write to a path; each call gets its own file
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.unlink(path)
+
+
+def load_stt(kind: str, language: str = "en-US", vosk_model_path: str = ""):
+    if kind == "google":
+        return GoogleSTT(language)
+    if kind == "sphinx":
+        return SphinxSTT(language)
+    if kind == "vosk":
+        return VoskSTT(vosk_model_path)
+    raise ValueError(f"Unknown speech-to-text backend '{kind}'; expected one of {', '.join(STT_BACKENDS)}")
+
+
+def load_tts(kind: str, rate: int = 0):
+    if kind == "pyttsx3":
+        return Pyttsx3TTS(rate)
+    raise ValueError(f"Unknown text-to-speech backend '{kind}'; expected one of {', '.join(TTS_BACKENDS)}")
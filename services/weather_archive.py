@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+import zipfile
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from services.http_client import AsyncHttpClient
+from utils.logging import setup_logging
+from utils.metrics import timed
+from utils.single_flight import SingleFlight
+
+logger = setup_logging()
+
+ARCHIVE_START = date(2020, 1, 1)
+DAILY_FIELDS = ("temperature_2m_max", "temperature_2m_min", "relative_humidity_2m_mean")
+
+
+class OpenMeteoFetcher:
+    # Default upstream; anything with a compatible async fetch_daily() can
+    # replace it, e.g. a fetcher pointed at a local stub server in tests.
+    def __init__(self, base_url: str, http_client: AsyncHttpClient, timeout: float = 30.0):
+        self.base_url = base_url
+        self.http_client = http_client
+        self.timeout = timeout
+
+    @timed("weather.fetch")
+    async def fetch_daily(self, lat: float, lon: float, timezone: str, start: date, end: date) -> Dict[str, List]:
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "daily": ",".join(DAILY_FIELDS),
+            "timezone": timezone
+        }
+        # No response cache here: the archive falls back to its copy on disk when this fails
+        payload = await self.http_client.get_json(self.base_url, params=params, timeout=self.timeout)
+        return payload["daily"]
+
+
+class WeatherArchive:
+    # Keeps the full daily history per country as columnar arrays in
+    # <storage_dir>/<country>.npz and only downloads the missing tail.
+    def __init__(
+        self,
+        storage_dir: str,
+        fetcher,
+        start_date: date = ARCHIVE_START,
+        refresh_days: int = 7,
+        sync_interval: float = 3600.0
+    ):
+        self.storage_dir = storage_dir
+        self.fetcher = fetcher
+        self.start_date = start_date
+        # The archive API lags a few days behind and back-fills recent values,
+        # so the last refresh_days are re-downloaded on every sync.
+        self.refresh_days = refresh_days
+        self.sync_interval = sync_interval
+        self._data: Dict[str, Dict[str, np.ndarray]] = {}
+        self._synced_at: Dict[str, float] = {}
+        self._versions: Dict[str, int] = {}
+        self._syncs = SingleFlight()
+        os.makedirs(storage_dir, exist_ok=True)
+
+    def _path(self, country: str) -> str:
+        return os.path.join(self.storage_dir, country.replace(" ", "_") + ".npz")
+
+    def _read(self, country: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(country)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as stored:
+                data = {name: stored[name] for name in ("time",) + DAILY_FIELDS}
+            if any(len(column) != len(data["time"]) for column in data.values()):
+                raise ValueError("columns differ in length")
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            # A truncated or corrupt file is dropped and rebuilt by the next sync
+            logger.warning(f"Discarding unreadable weather archive {path}: {str(e)}")
+            os.remove(path)
+            return None
+        return data
+
+    async def load(self, country: str) -> Optional[Dict[str, np.ndarray]]:
+        if country in self._data:
+            return self._data[country]
+        data = await asyncio.to_thread(self._read, country)
+        if data is None:
+            return None
+        self._data[country] = data
+        self._versions[country] = self._versions.get(country, 0) + 1
+        return data
+
+    def version(self, country: str) -> int:
+        # Bumped whenever the in-memory arrays for a country are replaced
+        return self._versions.get(country, 0)
+
+    def _save(self, country: str, data: Dict[str, np.ndarray]):
+        path = self._path(country)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _to_arrays(daily: Dict[str, List]) -> Dict[str, np.ndarray]:
+        data = {"time": np.array(daily["time"], dtype="datetime64[D]")}
+        for field in DAILY_FIELDS:
+            # None -> NaN when converting to float
+            data[field] = np.array(daily[field], dtype=np.float64).astype(np.float32)
+        return data
+
+    async def sync(self, country: str, coords: Dict) -> Dict[str, np.ndarray]:
+        # Concurrent requests for the same country wait on one sync. It runs as
+        # its own task so a caller's timeout (the chat prompt gives weather a few
+        # seconds) does not throw away a long first download before it is saved.
+        existing = self._data.get(country)
+        if existing is not None and time.monotonic() - self._synced_at.get(country, -np.inf) < self.sync_interval:
+            return existing
+        return await self._syncs.run(country, lambda: self._sync(country, coords))
+
+    @timed("weather.archive_sync")
+    async def _sync(self, country: str, coords: Dict) -> Dict[str, np.ndarray]:
+        existing = await self.load(country)
+        now = time.monotonic()
+        if existing is not None and now - self._synced_at.get(country, -np.inf) < self.sync_interval:
+            return existing
+
+        end = date.today()
+        start = self.start_date
+        if existing is not None and len(existing["time"]):
+            last = existing["time"][-1].item()
+            start = max(self.start_date, last - timedelta(days=self.refresh_days - 1))
+        try:
+            daily = await self.fetcher.fetch_daily(coords["lat"], coords["lon"], coords["timezone"], start, end)
+        except Exception as e:
+            if existing is None:
+                raise
+            logger.warning(f"Weather sync for {country} failed, serving archived data: {str(e)}")
+            return existing
+
+        fresh = self._to_arrays(daily)
+        if existing is not None:
+            keep = existing["time"] < np.datetime64(start, "D")
+            fresh = {name: np.concatenate([existing[name][keep], fresh[name]]) for name in fresh}
+        await asyncio.to_thread(self._save, country, fresh)
+        self._data[country] = fresh
+        self._versions[country] = self._versions.get(country, 0) + 1
+        self._synced_at[country] = now
+        logger.info(f"Synced weather archive for {country}: {len(fresh['time'])} days (fetched from {start})")
+        return fresh
@@ -1,15 +1,31 @@
-import requests
+import asyncio
 import json
-from datetime import datetime
-from typing import Dict, List
+import numpy as np
+from typing import Dict, Optional
 from config.settings import Settings
+from services.http_client import AsyncHttpClient
+from services.weather_archive import OpenMeteoFetcher, WeatherArchive
+from services.weather_stats import FIELDS, compute_climate_stats
 from utils.logging import setup_logging
+from utils.metrics import timed
 
 logger = setup_logging()
 
 class WeatherService:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, http_client: Optional[AsyncHttpClient] = None, fetcher=None):
         self.base_url = settings.weather_api_base_url
+        if fetcher is None:
+            fetcher = OpenMeteoFetcher(
+                settings.weather_archive_url,
+                http_client or AsyncHttpClient(timeout=settings.weather_request_timeout),
+                timeout=settings.weather_request_timeout
+            )
+        self.archive = WeatherArchive(
+            settings.weather_archive_dir,
+            fetcher,
+            sync_interval=settings.weather_sync_interval_seconds
+        )
+        self._derived: Dict[str, "_DerivedWeather"] = {}
         self.country_coords = {
     "afghanistan": {"lat": 34.5553, "lon": 69.2075, "timezone": "Asia/Kabul"},
     "albania": {"lat": 41.3275, "lon": 19.8187, "timezone": "Europe/Tirane"},
@@ -62,50 +78,57 @@ class WeatherService:
     "zambia": {"lat": -15.3875, "lon": 28.3228, "timezone": "Africa/Lusaka"}
 }
 
+    @timed("weather.summary")
     async def fetch_weather_summary(self, country: str) -> str:
         if country not in self.country_coords:
             return "Country not supported"
         try:
-            lat = self.country_coords[country]["lat"]
-            lon = self.country_coords[country]["lon"]
-            timezone = self.country_coords[country]["timezone"]
-            start_date = "2020-01-01"
-            end_date = datetime.now().strftime("%Y-%m-%d")
-            url = f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}&start_date={start_date}&end_date={end_date}&daily=temperature_2m_max,temperature_2m_min,relative_humidity_2m_mean&timezone={timezone}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            max_temps = [day["temperature_2m_max"] for day in data["daily"] if day["temperature_2m_max"] is not None]
-            min_temps = [day["temperature_2m_min"] for day in data["daily"] if day["temperature_2m_min"] is not None]
-            humidities = [day["relative_humidity_2m_mean"] for day in data["daily"] if day["relative_humidity_2m_mean"] is not None]
-            summary = {
-                "avg_max_temp": sum(max_temps) / len(max_temps) if max_temps else None,
-                "avg_min_temp": sum(min_temps) / len(min_temps) if min_temps else None,
-                "avg_humidity": sum(humidities) / len(humidities) if humidities else None
-            }
-            return json.dumps(summary)
+            return (await self._get_derived(country)).summary_json
         except Exception as e:
             logger.error(f"Error fetching weather data: {str(e)}")
             return "Weather data unavailable"
 
-    def get_full_weather_data(self, country: str) -> List[Dict]:
+    @timed("weather.history")
+    async def get_full_weather_json(self, country: str) -> str:
         if country not in self.country_coords:
             raise ValueError("Country not supported")
-        lat = self.country_coords[country]["lat"]
-        lon = self.country_coords[country]["lon"]
-        timezone = self.country_coords[country]["timezone"]
-        start_date = "2020-01-01"
-        end_date = datetime.now().strftime("%Y-%m-%d")
-        url = f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}&start_date={start_date}&end_date={end_date}&daily=temperature_2m_max,temperature_2m_min,relative_humidity_2m_mean&timezone={timezone}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return [
+        return (await self._get_derived(country)).rows_json
+
+    async def _get_derived(self, country: str) -> "_DerivedWeather":
+        # Aggregates are recomputed only when the archive changes, so the
+        # per-request cost is a version check.
+        data = await self.archive.sync(country, self.country_coords[country])
+        version = self.archive.version(country)
+        derived = self._derived.get(country)
+        if derived is None or derived.version != version:
+            derived = await asyncio.to_thread(_DerivedWeather, version, data)
+            if derived.version >= self.archive.version(country):
+                self._derived[country] = derived
+        return derived
+
+
+class _DerivedWeather:
+    def __init__(self, version: int, data: Dict[str, np.ndarray]):
+        self.version = version
+        stats = compute_climate_stats(data)
+        overall = stats["overall_mean"] if stats else {}
+        self.summary_json = json.dumps({
+            "avg_max_temp": overall.get("max_temp"),
+            "avg_min_temp": overall.get("min_temp"),
+            "avg_humidity": overall.get("humidity"),
+            "climate": stats
+        })
+        columns = [
+            np.datetime_as_string(data["time"], unit="D").tolist(),
+            *(np.round(data[field].astype(np.float64), 2).tolist() for field in FIELDS)
+        ]
+        rows = [
             {
-                "Date": data["daily"]["time"][i],
-                "MaxTemp": data["daily"]["temperature_2m_max"][i],
-                "MinTemp": data["daily"]["temperature_2m_min"][i],
-                "Humidity": data["daily"]["relative_humidity_2m_mean"][i]
+                "Date": day,
+                "MaxTemp": None if max_temp != max_temp else max_temp,
+                "MinTemp": None if min_temp != min_temp else min_temp,
+                "Humidity": None if humidity != humidity else humidity
             }
-            for i in range(len(data["daily"]["time"]))
-        ]
\ No newline at end of file
+            for day, max_temp, min_temp, humidity in zip(*columns)
+        ]
+        self.rows_json = json.dumps(rows)
\ No newline at end of file
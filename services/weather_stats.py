@@ -0,0 +1,101 @@
+from typing import Dict, Optional
+import numpy as np
+
+FIELDS = {
+    "temperature_2m_max": "max_temp",
+    "temperature_2m_min": "min_temp",
+    "relative_humidity_2m_mean": "humidity"
+}
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+SEASONS = ("DJF", "MAM", "JJA", "SON")
+# month index (0 = January) -> season index
+_MONTH_TO_SEASON = np.array([0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+ROLLING_WINDOWS = (30, 90)
+
+
+def _round(values: np.ndarray) -> list:
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+
+def _grouped_means(values: np.ndarray, valid: np.ndarray, groups: np.ndarray, size: int) -> np.ndarray:
+    # values/valid: (days, fields); returns (size, fields) NaN-aware means
+    sums = np.stack([
+        np.bincount(groups, weights=values[:, i], minlength=size) for i in range(values.shape[1])
+    ], axis=1)
+    counts = np.stack([
+        np.bincount(groups, weights=valid[:, i], minlength=size) for i in range(values.shape[1])
+    ], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _trailing_means(values: np.ndarray, valid: np.ndarray, window: int) -> np.ndarray:
+    # Rolling NaN-aware mean via cumulative sums; returns (days, fields)
+    zeros = np.zeros((1, values.shape[1]))
+    csum = np.concatenate([zeros, np.cumsum(values, axis=0)])
+    ccount = np.concatenate([zeros, np.cumsum(valid, axis=0)])
+    start = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    sums = csum[1:] - csum[start]
+    counts = ccount[1:] - ccount[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def compute_climate_stats(data: Dict[str, np.ndarray]) -> Optional[Dict]:
+    times = data["time"]
+    if not len(times):
+        return None
+    raw = np.stack([data[field].astype(np.float64) for field in FIELDS], axis=1)
+    valid = ~np.isnan(raw)
+    values = np.where(valid, raw, 0.0)
+    names = list(FIELDS.values())
+
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.where(counts > 0, values.sum(axis=0) / counts, np.nan)
+    months = times.astype("datetime64[M]").astype(np.int64) % 12
+    monthly = _grouped_means(values, valid, months, 12)
+    seasonal = _grouped_means(values, valid, _MONTH_TO_SEASON[months], 4)
+
+    # Anchor rolling windows on the last day that has any observation; the
+    # archive's trailing days are often still empty.
+    observed = np.flatnonzero(valid.any(axis=1))
+    last = observed[-1] if observed.size else len(times) - 1
+    day_of_year = (times - times.astype("datetime64[Y]")).astype(np.int64)
+    rolling = {}
+    for window in ROLLING_WINDOWS:
+        series = _trailing_means(values, valid, window)
+        # Same calendar window in earlier years gives the "normal" to compare against
+        same_window = _window_mask(day_of_year, int(day_of_year[last]), window)
+        same_window &= times <= times[last] - np.timedelta64(window, "D")
+        normal = _masked_mean(values, valid, same_window)
+        rolling[f"last_{window}_days"] = {
+            "mean": dict(zip(names, _round(series[last]))),
+            "anomaly_vs_normal": dict(zip(names, _round(series[last] - normal)))
+        }
+
+    return {
+        "period": {
+            "start": str(times[0]),
+            "end": str(times[last]),
+            "days": int(len(times))
+        },
+        "overall_mean": dict(zip(names, _round(overall))),
+        "seasonal_mean": {season: dict(zip(names, _round(row))) for season, row in zip(SEASONS, seasonal)},
+        "monthly_mean": {month: dict(zip(names, _round(row))) for month, row in zip(MONTHS, monthly)},
+        "rolling": rolling
+    }
+
+
+def _window_mask(day_of_year: np.ndarray, end_day: int, window: int) -> np.ndarray:
+    start_day = end_day - window + 1
+    if start_day >= 0:
+        return (day_of_year >= start_day) & (day_of_year <= end_day)
+    return (day_of_year <= end_day) | (day_of_year >= start_day + 365)
+
+
+def _masked_mean(values: np.ndarray, valid: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    weights = valid & mask[:, None]
+    counts = weights.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, (values * weights).sum(axis=0) / counts, np.nan)
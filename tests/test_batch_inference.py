@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from services.batch_inference import BatchInferenceEngine
+
+
+class RecordingModel:
+    # batch_fn stand-in: doubles each item and records the batch sizes it saw
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if self.error is not None:
+            raise self.error
+        return [item * 2 for item in items]
+
+
+def test_concurrent_requests_are_batched_up_to_max_size():
+    model = RecordingModel()
+    engine = BatchInferenceEngine(model, max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [engine.submit(i) for i in range(8)]
+        assert [future.result(timeout=2) for future in futures] == [i * 2 for i in range(8)]
+    finally:
+        engine.shutdown()
+    assert model.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    model = RecordingModel()
+    engine = BatchInferenceEngine(model, max_batch_size=16, max_wait_ms=20)
+    try:
+        started = time.monotonic()
+        futures = [engine.submit(i) for i in range(3)]
+        assert [future.result(timeout=2) for future in futures] == [0, 2, 4]
+        assert time.monotonic() - started < 1.0
+    finally:
+        engine.shutdown()
+    assert model.batches == [[0, 1, 2]]
+
+
+def test_batch_error_reaches_every_request_in_the_batch():
+    error = RuntimeError("model exploded")
+    engine = BatchInferenceEngine(RecordingModel(error), max_batch_size=4, max_wait_ms=200)
+    try:
+        futures = [engine.submit(i) for i in range(4)]
+        for future in futures:
+            assert future.exception(timeout=2) is error
+    finally:
+        engine.shutdown()
+
+
+def test_predict_awaits_the_batched_result():
+    engine = BatchInferenceEngine(RecordingModel(), max_batch_size=8, max_wait_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(engine.predict(i) for i in range(5)))
+
+    try:
+        assert asyncio.run(scenario()) == [0, 2, 4, 6, 8]
+    finally:
+        engine.shutdown()
+
+
+def test_shutdown_serves_queued_requests_then_refuses_new_ones():
+    release = threading.Event()
+
+    def slow_model(items):
+        release.wait(2)
+        return items
+
+    engine = BatchInferenceEngine(slow_model, max_batch_size=1, max_wait_ms=0)
+    first = engine.submit("a")
+    queued = engine.submit("b")
+    threads = list(engine._threads)
+
+    stopper = threading.Thread(target=engine.shutdown)
+    stopper.start()
+    release.set()
+    stopper.join(5)
+    assert first.result(timeout=0) == "a"
+    assert queued.result(timeout=0) == "b"
+    assert not any(thread.is_alive() for thread in threads)
+
+    with pytest.raises(RuntimeError):
+        engine.submit("c")
+    with pytest.raises(RuntimeError):
+        engine.start()
+    assert not engine._threads
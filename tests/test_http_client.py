@@ -0,0 +1,190 @@
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from services.http_client import AsyncHttpClient, CircuitOpenError, UpstreamError
+
+URL = "http://upstream.test/v1/archive"
+
+
+class FakeUpstream:
+    # httpx.MockTransport handler: counts calls, replays queued statuses, and
+    # can hold requests until released
+    def __init__(self, statuses=(), delay: float = 0.0):
+        self.calls = 0
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.entered = asyncio.Event()
+        self.release = None
+
+    async def __call__(self, request):
+        self.calls += 1
+        self.entered.set()
+        if self.release is not None:
+            await self.release.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status, json={"call": self.calls})
+
+
+def make_client(upstream: FakeUpstream, **kwargs) -> AsyncHttpClient:
+    kwargs.setdefault("backoff_base", 0.0)
+    return AsyncHttpClient(transport=httpx.MockTransport(upstream), **kwargs)
+
+
+def test_concurrent_identical_gets_share_one_request():
+    async def scenario():
+        upstream = FakeUpstream(delay=0.05)
+        client = make_client(upstream)
+        results = await asyncio.gather(*(client.get_json(URL, params={"q": 1}) for _ in range(10)))
+        await client.aclose()
+        return upstream, client, results
+
+    upstream, client, results = asyncio.run(scenario())
+    assert upstream.calls == 1
+    assert client.coalesced == 9
+    assert all(result == {"call": 1} for result in results)
+
+
+def test_different_params_are_not_coalesced():
+    async def scenario():
+        upstream = FakeUpstream(delay=0.01)
+        client = make_client(upstream)
+        await asyncio.gather(client.get_json(URL, params={"q": 1}), client.get_json(URL, params={"q": 2}))
+        await client.aclose()
+        return upstream
+
+    assert asyncio.run(scenario()).calls == 2
+
+
+def test_503_is_retried_then_succeeds():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[503])
+        client = make_client(upstream, retries=2)
+        result = await client.get_json(URL)
+        await client.aclose()
+        return upstream, client, result
+
+    upstream, client, result = asyncio.run(scenario())
+    assert result == {"call": 2}
+    assert upstream.calls == 2
+    assert client.retried == 1
+    assert client.breaker(URL).state == "closed"
+
+
+def test_client_errors_are_not_retried():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[404])
+        client = make_client(upstream, retries=2)
+        with pytest.raises(UpstreamError):
+            await client.get_json(URL)
+        await client.aclose()
+        return upstream
+
+    assert asyncio.run(scenario()).calls == 1
+
+
+def test_breaker_opens_half_opens_and_closes():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[503, 503])
+        client = make_client(upstream, retries=0, failure_threshold=2, reset_timeout=0.05)
+        breaker = client.breaker(URL)
+        for _ in range(2):
+            with pytest.raises(UpstreamError):
+                await client.get_json(URL)
+        assert breaker.state == "open"
+
+        # While open, calls fail fast without reaching the upstream
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(URL)
+        assert upstream.calls == 2
+
+        await asyncio.sleep(0.06)
+        upstream.entered.clear()
+        upstream.release = asyncio.Event()
+        trial = asyncio.create_task(client.get_json(URL))
+        await upstream.entered.wait()
+        assert breaker.state == "half_open"
+        # Only one trial call is let through while half-open
+        with pytest.raises(CircuitOpenError):
+            await client.get_json(URL, params={"other": 1})
+
+        upstream.release.set()
+        assert await trial == {"call": 3}
+        assert breaker.state == "closed"
+        assert breaker.times_opened == 1
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens_the_breaker():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[503, 503])
+        client = make_client(upstream, retries=0, failure_threshold=1, reset_timeout=0.05)
+        with pytest.raises(UpstreamError):
+            await client.get_json(URL)
+        await asyncio.sleep(0.06)
+        with pytest.raises(UpstreamError):
+            await client.get_json(URL)
+        assert client.breaker(URL).state == "open"
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+async def _open_then_start_trial(client: AsyncHttpClient, upstream: FakeUpstream):
+    with pytest.raises(UpstreamError):
+        await client.get_json(URL)
+    await asyncio.sleep(0.06)
+    upstream.entered.clear()
+    upstream.release = asyncio.Event()
+    waiter = asyncio.create_task(client.get_json(URL))
+    await upstream.entered.wait()
+    return waiter
+
+
+def test_cancelled_waiter_does_not_strand_the_trial():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[503])
+        client = make_client(upstream, retries=0, failure_threshold=1, reset_timeout=0.05)
+        breaker = client.breaker(URL)
+        waiter = await _open_then_start_trial(client, upstream)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # The shared upstream call carries on and settles the breaker
+        upstream.release.set()
+        while client.stats()["in_flight"]:
+            await asyncio.sleep(0.01)
+        assert breaker.state == "closed"
+        assert not breaker._trial_in_flight
+        assert await client.get_json(URL) == {"call": 3}
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_call_releases_the_breaker():
+    async def scenario():
+        upstream = FakeUpstream(statuses=[503])
+        client = make_client(upstream, retries=0, failure_threshold=1, reset_timeout=0.05)
+        breaker = client.breaker(URL)
+        waiter = await _open_then_start_trial(client, upstream)
+
+        # Cancelling the upstream call itself (as aclose() does on shutdown)
+        client._in_flight.cancel_all()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert breaker.state == "half_open"
+        assert not breaker._trial_in_flight
+
+        upstream.release.set()
+        assert await client.get_json(URL) == {"call": 3}
+        assert breaker.state == "closed"
+        await client.aclose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import date, timedelta
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("httpx")
+
+from benchmarks.mock_servers import MockWeatherArchiveServer
+from services.http_client import AsyncHttpClient
+from services.weather_archive import DAILY_FIELDS, OpenMeteoFetcher, WeatherArchive
+
+COORDS = {"lat": -1.29, "lon": 36.82, "timezone": "Africa/Nairobi"}
+DAYS = 60
+
+
+class RecordingFetcher(OpenMeteoFetcher):
+    # Records the date range of every archive download
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranges = []
+
+    async def fetch_daily(self, lat, lon, timezone, start, end):
+        self.ranges.append((start, end))
+        return await super().fetch_daily(lat, lon, timezone, start, end)
+
+
+@pytest.fixture
+def server():
+    server = MockWeatherArchiveServer(delay=0.0).start()
+    yield server
+    server.stop()
+
+
+def run_archive(server, storage_dir, scenario, delay=0.0):
+    async def main():
+        server.delay = delay
+        client = AsyncHttpClient(retries=0)
+        fetcher = RecordingFetcher(server.url, client)
+        archive = WeatherArchive(
+            str(storage_dir), fetcher, start_date=date.today() - timedelta(days=DAYS - 1), sync_interval=0
+        )
+        try:
+            return fetcher, await scenario(archive)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+def assert_complete(data):
+    days = np.arange(date.today() - timedelta(days=DAYS - 1), date.today() + timedelta(days=1), dtype="datetime64[D]")
+    assert np.array_equal(data["time"], days)
+    for field in DAILY_FIELDS:
+        assert len(data[field]) == DAYS
+        assert not np.isnan(data[field]).any()
+
+
+def test_initial_sync_downloads_full_history(server, tmp_path):
+    fetcher, data = run_archive(server, tmp_path, lambda archive: archive.sync("Kenya", COORDS))
+    assert fetcher.ranges == [(date.today() - timedelta(days=DAYS - 1), date.today())]
+    assert_complete(data)
+    assert (tmp_path / "Kenya.npz").exists()
+
+
+def test_sync_fetches_only_missing_days(server, tmp_path):
+    run_archive(server, tmp_path, lambda archive: archive.sync("Kenya", COORDS))
+    # Age the stored archive by dropping its last 20 days
+    with np.load(tmp_path / "Kenya.npz") as stored:
+        old = {name: stored[name][:-20] for name in stored.files}
+    np.savez(tmp_path / "Kenya.npz", **old)
+
+    async def resync(archive):
+        archive.refresh_days = 3
+        return await archive.sync("Kenya", COORDS)
+
+    fetcher, data = run_archive(server, tmp_path, resync)
+    last_kept = old["time"][-1].item()
+    assert fetcher.ranges == [(last_kept - timedelta(days=2), date.today())]
+    assert_complete(data)
+    with np.load(tmp_path / "Kenya.npz") as stored:
+        assert len(stored["time"]) == DAYS
+
+
+@pytest.mark.parametrize("damage", ["garbage", "truncated"])
+def test_corrupt_archive_is_discarded_and_rebuilt(server, tmp_path, damage):
+    path = tmp_path / "Kenya.npz"
+    if damage == "garbage":
+        path.write_bytes(b"not an npz file")
+    else:
+        run_archive(server, tmp_path, lambda archive: archive.sync("Kenya", COORDS))
+        path.write_bytes(path.read_bytes()[:200])
+
+    fetcher, data = run_archive(server, tmp_path, lambda archive: archive.sync("Kenya", COORDS))
+    assert fetcher.ranges == [(date.today() - timedelta(days=DAYS - 1), date.today())]
+    assert_complete(data)
+    with np.load(path) as stored:
+        assert len(stored["time"]) == DAYS
+
+
+def test_concurrent_syncs_share_one_fetch(server, tmp_path):
+    async def scenario(archive):
+        return await asyncio.gather(*(archive.sync("Kenya", COORDS) for _ in range(5)))
+
+    fetcher, results = run_archive(server, tmp_path, scenario, delay=0.2)
+    assert len(fetcher.ranges) == 1
+    assert server.requests == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_sync_survives_a_caller_timeout(server, tmp_path):
+    async def scenario(archive):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(archive.sync("Kenya", COORDS), timeout=0.05)
+        # The download carried on and was saved for the next caller
+        return await archive.sync("Kenya", COORDS)
+
+    fetcher, data = run_archive(server, tmp_path, scenario, delay=0.2)
+    assert len(fetcher.ranges) == 1
+    assert_complete(data)
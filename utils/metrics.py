@@ -0,0 +1,206 @@
+import asyncio
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to multi-second LLM generations
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _State:
+    enabled = False
+
+
+_state = _State()
+
+
+def configure(enabled: bool):
+    _state.enabled = enabled
+
+
+def enabled() -> bool:
+    return _state.enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_format(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labelvalues -> [per-bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = 0
+        while value > self.buckets[index]:
+            index += 1
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labelvalues: list(series) for labelvalues, series in self._series.items()}
+        for labelvalues, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(series[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        # For values read at scrape time (cache sizes, hit counters) rather than updated per call
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram("agri_stage_duration_seconds", "Time spent in each service stage", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("agri_stage_errors_total", "Service stage calls that raised", ("stage",))
+HTTP_SECONDS = REGISTRY.histogram("agri_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+HTTP_REQUESTS = REGISTRY.counter("agri_http_requests_total", "HTTP requests by status", ("method", "route", "status"))
+
+
+def observe_stage(stage: str, seconds: float, failed: bool = False):
+    if not _state.enabled:
+        return
+    STAGE_SECONDS.observe(seconds, stage)
+    if failed:
+        STAGE_ERRORS.inc(stage)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    if not _state.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        # Cancellation and generator close are not counted as errors
+        failed = True
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start, failed)
+
+
+async def _timed_agen(stage: str, agen: AsyncIterator):
+    # Spans the whole iteration, from first pull to exhaustion or close
+    try:
+        with span(stage):
+            async for item in agen:
+                yield item
+    finally:
+        await agen.aclose()
+
+
+def timed(stage: str):
+    # Decorator for sync functions, coroutines and async generators. When
+    # metrics are disabled the wrapper costs one attribute check per call.
+    def decorate(func):
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            def agen_wrapper(*args, **kwargs):
+                if not _state.enabled:
+                    return func(*args, **kwargs)
+                return _timed_agen(stage, func(*args, **kwargs))
+            return agen_wrapper
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _state.enabled:
+                    return await func(*args, **kwargs)
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return func(*args, **kwargs)
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def render() -> str:
+    return REGISTRY.render()
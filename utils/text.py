@@ -0,0 +1,21 @@
+import re
+from typing import AsyncIterator
+
+_SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+
+
+async def iter_sentences(tokens: AsyncIterator[str], min_chars: int = 40) -> AsyncIterator[str]:
+    # Regroups streamed tokens into sentences; very short ones (list numbers,
+    # abbreviations) are merged into the next so each TTS call has real content
+    buffer = ""
+    async for token in tokens:
+        buffer += token
+        while True:
+            match = next((m for m in _SENTENCE_END.finditer(buffer) if m.end() >= min_chars), None)
+            if match is None:
+                break
+            sentence, buffer = buffer[:match.end()].strip(), buffer[match.end():]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()